@@ -0,0 +1,120 @@
+# benchmarks/bench_loop.py
+"""Measure the agent loop's own overhead against the local mock API.
+
+Usage:
+    python benchmarks/bench_loop.py [--steps 5] [--runs 3] [--latency 0.2]
+                                    [--streaming] [--async-runtime]
+                                    [--action-format tool_use|text]
+                                    [--timing-profile careful|normal|turbo]
+
+A mock server replays a scripted task (move/click steps, then
+[completed]), so a run needs no network or API key. Actions really run
+through pyautogui, so use a display you do not mind being driven (e.g.
+Xvfb on Linux). Reported "overhead" is wall time minus the simulated
+server latency.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_server import MockAnthropicServer
+from computeruse.core.async_interface import AsyncInterface
+from computeruse.utils.config import Config
+from computeruse.utils.logger import Logger
+
+MOCK_API_KEY = "sk-ant-mock-" + "0" * 40
+
+
+def build_script(steps: int) -> List[str]:
+    script = []
+    for i in range(steps):
+        x, y = 100 + (i * 37) % 400, 100 + (i * 53) % 300
+        script.append(f"1. [move]<{x},{y}>\n2. [click]")
+    script.append("[completed]")
+    return script
+
+
+def run_once(args, server: MockAnthropicServer) -> Dict[str, float]:
+    config = Config()
+    config.update_setting('api_base_url', server.base_url)
+    config.update_setting('wait_time', args.wait_time)
+    config.update_setting('streaming', args.streaming)
+    config.update_setting('action_format', args.action_format)
+    config.update_setting('timing_profile', args.timing_profile)
+    config.update_setting('max_iterations', args.steps + 5)
+
+    interface = AsyncInterface(config, Logger())
+    interface.initialize_interface()
+    interface.initialize_anthropic(MOCK_API_KEY)
+
+    phases: Dict[str, List[float]] = {}
+    def collect(phase, step):
+        if phase == 'step_end':
+            for name, seconds in step.timings.items():
+                phases.setdefault(name, []).append(seconds)
+    interface.add_step_hook(collect)
+
+    interface.reset_state()
+    interface.current_task = "benchmark"
+    interface.update_target_resolution(config.get_setting('downscale_factor'))
+    text = "Task to complete: benchmark\nYou are now given the latest screenshot for the current state."
+
+    requests_before = server.requests
+    start = time.perf_counter()
+    if args.async_runtime:
+        asyncio.run(interface.run_task(text))
+    else:
+        initial_message = interface.create_message_with_screenshot(text)
+        interface.conversation_history.append(initial_message)
+        interface.process_response(interface.send_message([initial_message]))
+    wall = time.perf_counter() - start
+    interface.screenshot_manager.shutdown()
+
+    requests = server.requests - requests_before
+    result = {
+        "wall_s": wall,
+        "requests": requests,
+        "overhead_s": wall - requests * args.latency,
+        "iterations": interface.current_iteration
+    }
+    for name, values in phases.items():
+        result[f"{name}_ms"] = statistics.median(values) * 1000
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=5, help="action steps before [completed]")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.2, help="simulated time to first byte")
+    parser.add_argument('--chunk-delay', type=float, default=0.005, help="delay between streamed chunks")
+    parser.add_argument('--wait-time', type=float, default=0.5, help="post-action settle cap")
+    parser.add_argument('--streaming', action='store_true')
+    parser.add_argument('--async-runtime', action='store_true')
+    parser.add_argument('--action-format', choices=["tool_use", "text"], default="tool_use")
+    parser.add_argument('--timing-profile', choices=["careful", "normal", "turbo"], default="normal")
+    args = parser.parse_args()
+
+    with MockAnthropicServer(build_script(args.steps), latency=args.latency,
+                             chunk_delay=args.chunk_delay, action_format=args.action_format) as server:
+        print(f"Mock API at {server.base_url}; {args.steps} steps, {args.runs} runs, {args.action_format} actions, "
+              f"{args.timing_profile} timing, "
+              f"{'async' if args.async_runtime else 'sync'} runtime, "
+              f"{'streaming' if args.streaming else 'non-streaming'}")
+        results = [run_once(args, server) for _ in range(args.runs)]
+
+    keys = sorted({key for result in results for key in result})
+    for key in keys:
+        values = [result[key] for result in results if key in result]
+        print(f"{key:>14}: median {statistics.median(values):9.3f}  min {min(values):9.3f}")
+
+
+if __name__ == '__main__':
+    main()
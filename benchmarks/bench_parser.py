@@ -0,0 +1,97 @@
+# benchmarks/bench_parser.py
+"""Micro-benchmark of the action parser on large multi-step plans.
+
+Usage:
+    python benchmarks/bench_parser.py [--steps 10 100 1000] [--repeat 200]
+
+Compares the compiled single-pass parser with the previous line-by-line
+in/replace parser (kept here for reference) on generated plans that
+interleave numbered actions with purpose lines.
+
+The compiled parser is not faster: legacy/new is about 0.75-0.95x, i.e.
+up to ~1.3x slower. It builds a typed record (and an int line number)
+per action where the legacy parser builds plain tuples, which costs more
+than the in/replace scanning it saves.
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from computeruse.core.action_parser import parse_actions
+
+TEMPLATES = [
+    "[move]<{x},{y}>", "[click]", "[type]\"Search term {i}\"", "[key_press]return",
+    "[wait]1", "[double_click]", "[mouse_scroll]<-3>", "[drag]<{y},{x}>", "[screenshot]"
+]
+
+
+def build_plan(steps: int) -> str:
+    lines = ["location of the window icon in bottom task bar is : <506,707>"]
+    for i in range(steps):
+        action = TEMPLATES[i % len(TEMPLATES)].format(x=(i * 37) % 1280, y=(i * 53) % 720, i=i)
+        lines.append(f"{i + 1}. {action}")
+        lines.append(f"to perform step {i + 1} of the plan")
+    return "\n".join(lines)
+
+
+def legacy_parse(text: str):
+    """The previous parser: lowercases, then chains in/replace per line"""
+    text = text.lower()
+    actions = []
+    line_number = 1
+    for line in text.split('\n'):
+        if str(line_number) + '.' in line:
+            line = line.replace(str(line_number) + '.', '').strip()
+        else:
+            continue
+        if '[screenshot]' in line:
+            actions.append(('screenshot', {}))
+        elif '[move]' in line:
+            coordinates = line.replace('[move]', '').strip().replace('<', '').replace('>', '')
+            x, y = map(float, coordinates.split(','))
+            actions.append(('mouse_move', {'coordinate': [x, y]}))
+        elif '[click]' in line:
+            actions.append(('left_click', {}))
+        elif '[double_click]' in line:
+            actions.append(('double_click', {}))
+        elif '[right_click]' in line:
+            actions.append(('right_click', {}))
+        elif '[mouse_scroll]' in line:
+            amount = line.replace('[mouse_scroll]', '').strip().replace('<', '').replace('>', '')
+            actions.append(('mouse_scroll', {'amount': amount}))
+        elif '[type]' in line:
+            actions.append(('type', {'text': line.replace('[type]', '').strip().replace('"', '')}))
+        elif '[key_press]' in line:
+            key = line.replace('[key_press]', '').strip().replace('<', '').replace('>', '')
+            actions.append(('key_press', {'text': key}))
+        elif '[drag]' in line:
+            coordinates = line.replace('[drag]', '').strip().replace('<', '').replace('>', '')
+            x, y = map(float, coordinates.split(','))
+            actions.append(('drag', {'coordinate': [x, y]}))
+        elif '[wait]' in line:
+            actions.append(('wait', {'duration': line.replace('[wait]', '').strip()}))
+        line_number += 1
+    return actions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'steps':>6} {'legacy us':>10} {'compiled us':>12} {'us/line':>8} {'legacy/new':>10}")
+    for steps in args.steps:
+        plan = build_plan(steps)
+        assert len(parse_actions(plan).actions) == len(legacy_parse(plan)) == steps
+        legacy = min(timeit.repeat(lambda: legacy_parse(plan), number=args.repeat, repeat=3)) / args.repeat
+        compiled = min(timeit.repeat(lambda: parse_actions(plan), number=args.repeat, repeat=3)) / args.repeat
+        print(f"{steps:>6} {legacy * 1e6:>10.1f} {compiled * 1e6:>12.1f} "
+              f"{compiled * 1e6 / (2 * steps + 1):>8.2f} {legacy / compiled:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_resize.py
+"""Compare screenshot downscale modes by latency and encoded JPEG size.
+
+Usage:
+    python benchmarks/bench_resize.py [--capture] [--width 3840 --height 2160]
+                                      [--scales 0.5 0.25 0.4] [--repeat 10]
+
+Without --capture a synthetic desktop-like frame is used so the benchmark
+also runs on machines without a display.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from computeruse.core.image_encoder import JpegEncoder
+from computeruse.core.image_resize import RESIZE_MODES, choose_resize_mode, resize_frame
+from computeruse.utils.config import Config
+
+
+def synthetic_frame(width: int, height: int) -> Image.Image:
+    """Build a frame with windows, text-like stripes and a gradient wallpaper"""
+    image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    draw = ImageDraw.Draw(image)
+    for i in range(6):
+        left = (i * width) // 7
+        top = (i * height) // 9
+        draw.rectangle((left, top, left + width // 3, top + height // 3), fill=(245, 245, 245), outline=(60, 60, 60))
+        for row in range(top + 30, top + height // 3 - 10, 18):
+            draw.text((left + 12, row), "The quick brown fox jumps over the lazy dog 0123456789", fill=(20, 20, 20))
+    draw.rectangle((0, height - 48, width, height), fill=(32, 32, 40))
+    return image
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--capture', action='store_true', help="use a live pyautogui capture")
+    parser.add_argument('--width', type=int, default=3840)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--scales', type=float, nargs='+', default=[0.5, 0.25, 0.4, 0.7])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.capture:
+        import pyautogui
+        frame = pyautogui.screenshot()
+    else:
+        frame = synthetic_frame(args.width, args.height)
+
+    config = Config()
+    encoder = JpegEncoder(config, None)
+    modes = [mode for mode in RESIZE_MODES if mode != 'auto']
+
+    print(f"Source frame: {frame.width}x{frame.height}, {args.repeat} runs per mode")
+    print(f"{'scale':>6} {'mode':>12} {'auto?':>6} {'median ms':>10} {'min ms':>8} {'jpeg KB':>8}")
+    for scale in args.scales:
+        size = (int(frame.width * scale), int(frame.height * scale))
+        auto_mode = choose_resize_mode(scale)
+        for mode in modes:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                resized, used = resize_frame(frame, size, scale, mode)
+                timings.append((time.perf_counter() - start) * 1000)
+            data, _ = encoder.encode(resized)
+            label = used if used == mode else f"{mode}->{used}"
+            print(
+                f"{scale:>6.2f} {label:>12} {'*' if mode == auto_mode else '':>6} "
+                f"{statistics.median(timings):>10.1f} {min(timings):>8.1f} {len(data) / 1024:>8.1f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/fuzz_parser.py
+"""Check the action parser against its corpus, then fuzz it with mutations.
+
+Usage:
+    python benchmarks/fuzz_parser.py [--iterations 20000] [--seed 0]
+
+Every corpus entry must parse to exactly its expected actions and error
+count. Mutated inputs (inserted, deleted and swapped characters, case
+flips, truncation, line shuffles) must never raise, and every record
+must be a well-formed action or error. Exits non-zero on any failure.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from computeruse.core.action_parser import Action, ParseError, parse_action_line, parse_actions
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_corpus.json')
+ALPHABET = "0123456789.,<>[]\"'-+ \t\n\r*`)_abcdeklmnoprstuvwyzCOMPLETED안é"
+
+
+def check_corpus(corpus) -> int:
+    failures = 0
+    for case in corpus:
+        result = parse_actions(case["text"])
+        actions = [[action.kind, action.tool_input()] for action in result.actions]
+        expected = [[kind, tool_input] for kind, tool_input in case["actions"]]
+        ok = (actions == expected
+              and len(result.errors) == case["errors"]
+              and result.completed == case.get("completed", False))
+        if not ok:
+            failures += 1
+            print(f"FAIL {case['name']}: actions={actions} errors={result.errors} completed={result.completed}")
+    return failures
+
+
+def mutate(text: str, rng: random.Random) -> str:
+    chars = list(text)
+    for _ in range(rng.randint(1, 6)):
+        op = rng.randrange(6)
+        position = rng.randrange(len(chars) + 1)
+        if op == 0:
+            chars.insert(position, rng.choice(ALPHABET))
+        elif op == 1 and chars:
+            del chars[min(position, len(chars) - 1)]
+        elif op == 2 and len(chars) > 1:
+            other = rng.randrange(len(chars))
+            position = min(position, len(chars) - 1)
+            chars[position], chars[other] = chars[other], chars[position]
+        elif op == 3 and chars:
+            position = min(position, len(chars) - 1)
+            chars[position] = chars[position].swapcase()
+        elif op == 4:
+            chars = chars[:position]
+        else:
+            lines = "".join(chars).split("\n")
+            rng.shuffle(lines)
+            chars = list("\n".join(lines))
+    return "".join(chars)
+
+
+def check_record(record) -> bool:
+    if isinstance(record, ParseError):
+        return isinstance(record.message, str) and isinstance(record.line_number, int)
+    if not isinstance(record, Action) or not record.kind:
+        return False
+    tool_input = record.tool_input()
+    if 'coordinate' in tool_input:
+        return all(isinstance(value, float) for value in tool_input['coordinate'])
+    return True
+
+
+def fuzz(corpus, iterations: int, seed: int) -> int:
+    rng = random.Random(seed)
+    seeds = [case["text"] for case in corpus if case["text"]]
+    failures = 0
+    for i in range(iterations):
+        text = mutate(rng.choice(seeds), rng)
+        try:
+            result = parse_actions(text)
+            records = result.actions + result.errors
+            records += [record for line in text.split("\n")
+                        for record in [parse_action_line(line)] if record is not None]
+        except Exception as e:
+            failures += 1
+            print(f"RAISED on {text!r}: {type(e).__name__}: {e}")
+            continue
+        bad = [record for record in records if not check_record(record)]
+        if bad:
+            failures += 1
+            print(f"BAD RECORD on {text!r}: {bad}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with open(CORPUS, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+
+    corpus_failures = check_corpus(corpus)
+    print(f"Corpus: {len(corpus) - corpus_failures}/{len(corpus)} cases pass")
+    fuzz_failures = fuzz(corpus, args.iterations, args.seed)
+    print(f"Fuzz: {args.iterations} mutated inputs, {fuzz_failures} failures")
+    sys.exit(1 if corpus_failures or fuzz_failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+# benchmarks/mock_server.py
+"""Local stand-in for the Anthropic Messages API.
+
+Replays scripted replies in the agent's action text format, or as
+computer tool_use blocks translated from it, with configurable latency and
+usage figures, over plain JSON or SSE streaming. Point the client at it
+with the 'api_base_url' setting.
+
+Usage:
+    python benchmarks/mock_server.py [--port 8765] [--script replies.json]
+                                     [--latency 0.5] [--chunk-delay 0.01]
+                                     [--action-format tool_use|text]
+
+A script file is a JSON list of replies. Each entry is either the reply
+text or a recorded message object (whose text blocks are replayed). The
+reply for a request is chosen by the number of assistant turns already in
+its messages, so concurrent sessions each walk through the script.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Union
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from computeruse.core.action_parser import parse_actions
+
+DEFAULT_SCRIPT = [
+    "1. [move]<200,150>\n2. [click]",
+    "1. [type]\"hello from the mock server\"\n2. [key_press]enter",
+    "1. [wait]0.1",
+    "[completed]"
+]
+CHARS_PER_TOKEN = 4
+
+
+def _reply_text(entry: Union[str, Dict[str, Any]]) -> str:
+    if isinstance(entry, str):
+        return entry
+    return "".join(block.get("text", "") for block in entry.get("content", []) if block.get("type") == "text")
+
+
+def _tool_input(action) -> Optional[Dict[str, Any]]:
+    """computer tool input for a parsed text action; None if the tool has no equivalent"""
+    if action.kind in ('mouse_move', 'left_click_drag'):
+        return {"action": action.kind, "coordinate": [int(action.x), int(action.y)]}
+    if action.kind in ('left_click', 'right_click', 'double_click', 'middle_click', 'screenshot'):
+        return {"action": action.kind}
+    if action.kind == 'type':
+        return {"action": "type", "text": action.text}
+    if action.kind == 'key_press':
+        return {"action": "key", "text": action.key}
+    if action.kind == 'wait':
+        return {"action": "wait", "duration": action.seconds}
+    return None
+
+
+def _tool_content(text: str) -> List[Dict[str, Any]]:
+    """Translate a text-format reply into tool_use blocks; [completed] becomes a plain reply"""
+    parsed = parse_actions(text)
+    inputs = [tool_input for tool_input in map(_tool_input, parsed.actions) if tool_input]
+    if parsed.completed or not inputs:
+        return [{"type": "text", "text": "The task is completed."}]
+    return [
+        {"type": "tool_use", "id": f"toolu_mock_{uuid.uuid4().hex[:12]}", "name": "computer", "input": tool_input}
+        for tool_input in inputs
+    ]
+
+
+class MockAnthropicServer:
+    """Threaded HTTP server answering POST /v1/messages"""
+    def __init__(self, script: Optional[List[Union[str, Dict[str, Any]]]] = None,
+                 host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 chunk_delay: float = 0.0, chunk_chars: int = 8,
+                 input_tokens: Optional[int] = None, cache_read_tokens: int = 0,
+                 action_format: str = "text"):
+        self.script = [_reply_text(entry) for entry in (script or DEFAULT_SCRIPT)]
+        self.action_format = action_format
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunk_chars = max(1, chunk_chars)
+        self.input_tokens = input_tokens
+        self.cache_read_tokens = cache_read_tokens
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockAnthropicServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockAnthropicServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reply_for(self, request: Dict[str, Any]) -> str:
+        turn = sum(1 for message in request.get("messages", []) if message.get("role") == "assistant")
+        return self.script[turn] if turn < len(self.script) else "[completed]"
+
+    def content_for(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        text = self.reply_for(request)
+        if self.action_format == "tool_use":
+            return _tool_content(text)
+        return [{"type": "text", "text": text}]
+
+    def usage_for(self, request: Dict[str, Any], text: str) -> Dict[str, int]:
+        if self.input_tokens is not None:
+            input_tokens = self.input_tokens
+        else:
+            input_tokens = len(json.dumps(request.get("messages", []))) // CHARS_PER_TOKEN
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": len(text) // CHARS_PER_TOKEN + 1,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": self.cache_read_tokens
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_HEAD(self):
+                # Connection pre-warming
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                if self.path.split("?")[0] != "/v1/messages":
+                    self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                if server.latency > 0:
+                    time.sleep(server.latency)
+
+                content = server.content_for(request)
+                usage = server.usage_for(request, json.dumps(content))
+                tool_use = any(block["type"] == "tool_use" for block in content)
+                message = {
+                    "id": f"msg_mock_{uuid.uuid4().hex[:12]}",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": request.get("model", "mock"),
+                    "content": content,
+                    "stop_reason": "tool_use" if tool_use else "end_turn",
+                    "stop_sequence": None,
+                    "usage": usage
+                }
+                if request.get("stream"):
+                    self._send_stream(message)
+                else:
+                    self._send_json(200, message)
+
+            def _common_headers(self):
+                self.send_header("request-id", f"req_mock_{uuid.uuid4().hex[:12]}")
+                self.send_header("anthropic-ratelimit-requests-remaining", "1000")
+                self.send_header("anthropic-ratelimit-tokens-remaining", "1000000")
+
+            def _send_json(self, status: int, body: Dict[str, Any]):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self._common_headers()
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _send_stream(self, message: Dict[str, Any]):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self._common_headers()
+                self.end_headers()
+
+                start = dict(message, content=[], stop_reason=None,
+                             usage=dict(message["usage"], output_tokens=1))
+                self._event("message_start", {"type": "message_start", "message": start})
+                for index, block in enumerate(message["content"]):
+                    if block["type"] == "tool_use":
+                        self._event("content_block_start", {
+                            "type": "content_block_start", "index": index,
+                            "content_block": dict(block, input={})
+                        })
+                        self._chunks(index, "input_json_delta", "partial_json", json.dumps(block["input"]))
+                    else:
+                        self._event("content_block_start", {
+                            "type": "content_block_start", "index": index,
+                            "content_block": {"type": "text", "text": ""}
+                        })
+                        self._chunks(index, "text_delta", "text", block["text"])
+                    self._event("content_block_stop", {"type": "content_block_stop", "index": index})
+                self._event("message_delta", {
+                    "type": "message_delta",
+                    "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                    "usage": {"output_tokens": message["usage"]["output_tokens"]}
+                })
+                self._event("message_stop", {"type": "message_stop"})
+                self.close_connection = True
+
+            def _chunks(self, index: int, delta_type: str, field: str, text: str):
+                for i in range(0, len(text), server.chunk_chars):
+                    if server.chunk_delay > 0:
+                        time.sleep(server.chunk_delay)
+                    self._event("content_block_delta", {
+                        "type": "content_block_delta", "index": index,
+                        "delta": {"type": delta_type, field: text[i:i + server.chunk_chars]}
+                    })
+
+            def _event(self, name: str, data: Dict[str, Any]):
+                self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+        return Handler
+
+
+def load_script(path: Optional[str]) -> Optional[List[Union[str, Dict[str, Any]]]]:
+    if not path:
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--script', help="JSON list of replies (text or recorded messages)")
+    parser.add_argument('--latency', type=float, default=0.5, help="seconds before the response starts")
+    parser.add_argument('--chunk-delay', type=float, default=0.01, help="seconds between streamed chunks")
+    parser.add_argument('--input-tokens', type=int, help="fixed input token count to report")
+    parser.add_argument('--action-format', choices=["tool_use", "text"], default="tool_use",
+                        help="reply with computer tool calls or in the text action format")
+    args = parser.parse_args()
+
+    server = MockAnthropicServer(
+        load_script(args.script), host=args.host, port=args.port,
+        latency=args.latency, chunk_delay=args.chunk_delay, input_tokens=args.input_tokens,
+        action_format=args.action_format
+    )
+    print(f"Mock Anthropic API listening on {server.base_url} (set 'api_base_url' to use it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
 # computeruse/core/__init__.py
 from .interface import Interface
+from .async_interface import AsyncInterface
+from .request_scheduler import RequestScheduler
 from .action_handler import ActionHandler
 from .screenshot_manager import ScreenshotManager
\ No newline at end of file
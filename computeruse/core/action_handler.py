@@ -1,16 +1,16 @@
 # computeruse/core/action_handler.py
 import pyautogui
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import time
 import platform
-from PIL import Image
-from io import BytesIO
-import base64
+from .action_timing import ActionTimer
+from .text_entry import TextEntry
 
 class ActionHandler:
-    def __init__(self, config, logger):
+    def __init__(self, config, logger, screenshot_manager=None):
         self.config = config
         self.logger = logger
+        self.screenshot_manager = screenshot_manager
         
         # Get current scale from config
         self.current_scale = float(config.get_setting('downscale_factor'))
@@ -30,9 +30,10 @@ class ActionHandler:
         self.last_mouse_pos = None
         self.is_dragging = False
         
-        # Action timing
-        self.last_action_time = time.time()
-        self.min_action_delay = config.get_setting('min_action_delay', 0.5)
+        # Action timing: inter-action delays and move durations
+        self.timer = ActionTimer(config, logger)
+        # Text entry: paste, batched key events or per-character typing
+        self.text_entry = TextEntry(config, logger)
 
     def update_resolution_settings(self) -> None:
         """Update internal resolution settings from config"""
@@ -53,11 +54,6 @@ class ActionHandler:
     def execute_action(self, action: str, tool_input: dict) -> dict:
         """Execute the specified action with given parameters"""
         try:
-            # Ensure minimum delay between actions
-            elapsed = time.time() - self.last_action_time
-            if elapsed < self.min_action_delay:
-                time.sleep(self.min_action_delay - elapsed)
-
             # Map of available actions
             action_map = {
                 'screenshot': self._handle_screenshot,
@@ -65,7 +61,10 @@ class ActionHandler:
                 'left_click': self._handle_left_click,
                 'right_click': self._handle_right_click,
                 'double_click': self._handle_double_click,
+                'middle_click': self._handle_middle_click,
                 'drag': self._handle_drag,
+                'left_click_drag': self._handle_left_click_drag,
+                'cursor_position': self._handle_cursor_position,
                 'type': self._handle_type,
                 'key_press': self._handle_key_press,
                 'mouse_scroll': self._handle_mouse_scroll,
@@ -78,11 +77,13 @@ class ActionHandler:
                 self.logger.add_entry("Error", error_msg)
                 return {"type": "error", "error": error_msg}
 
+            # Leave the previous action its settle time
+            self.timer.wait_before(action)
+            
             # Execute action (only once)
             result = action_map[action](tool_input)
             
-            # Update last action time
-            self.last_action_time = time.time()
+            self.timer.done(action)
             return result
             
         except Exception as e:
@@ -91,83 +92,43 @@ class ActionHandler:
             return {"type": "error", "error": error_msg}
 
     def _handle_screenshot(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
-        try:
-            # Get current scale
-            self.current_scale = float(self.config.get_setting('downscale_factor'))
-            
-            # Take screenshot at native resolution
-            screenshot = pyautogui.screenshot()
-            original_width, original_height = screenshot.size
-            
-            # ALWAYS resize for Claude according to scale
-            # (e.g., 2560x1440 -> 1280x720 when scale is 0.5)
-            target_width = int(original_width * self.current_scale)
-            target_height = int(original_height * self.current_scale)
+        """Capture a new frame through the shared screenshot manager"""
+        if self.screenshot_manager is None:
+            error_msg = "Screenshot failed: no screenshot manager attached"
+            self.logger.add_entry("Error", error_msg)
+            return {"type": "error", "error": error_msg}
+        return self.screenshot_manager.take_screenshot()
 
-            screenshot = screenshot.resize(
-                (target_width, target_height),
-                Image.Resampling.LANCZOS
-            )
-            
-            # Save with quality settings
-            buffered = BytesIO()
-            screenshot.save(
-                buffered,
-                format="JPEG",
-                quality=self.config.get_setting('screenshot_quality', 90),
-                optimize=True
-            )
-            
-            img_str = base64.b64encode(buffered.getvalue()).decode()
-            size_kb = len(buffered.getvalue()) / 1024
-            
-            self.current_screenshot = {
-                "image_data": img_str,
-                "size": size_kb,
-                "resolution": f"{target_width}x{target_height}",
-                "scale_factor": self.current_scale,
-                "timestamp": time.time()
-            }
-            
-            self.logger.add_entry("System", 
-                f"Screenshot for Claude: {target_width}x{target_height} "
-                f"[scale: {self.current_scale:.1f}, size: {size_kb:.1f}KB]"
-            )
-            
-            return {
-                "type": "screenshot_taken",
-                "resolution": f"{target_width}x{target_height}",
-                "scale_factor": self.current_scale
-            }
-            
-        except Exception as e:
-            self.logger.add_entry("Error", f"Screenshot failed: {str(e)}")
-            return {"type": "error", "error": str(e)}
+    def _to_native(self, coordinates) -> Tuple[float, float]:
+        """Scale coordinates Claude gives for the scaled screenshot to native pixels"""
+        # Get scale from config
+        scale = float(self.config.get_setting('downscale_factor'))
+        
+        # Calculate scaled coordinates based on scale factor
+        # Claude always provides coordinates for scaled resolution
+        target_x = float(coordinates[0]) * (1.0 / scale)  # Scale up
+        target_y = float(coordinates[1]) * (1.0 / scale)  # Scale up
+        
+        self.logger.add_entry("Debug", 
+            f"Mouse move: Claude({coordinates[0]}, {coordinates[1]}) -> "
+            f"Native({target_x:.0f}, {target_y:.0f}) "
+            f"[scale: {scale:.1f}, upscale: {1.0/scale:.1f}x]"
+        )
+
+        # Validate bounds
+        target_x = max(0, min(target_x, self.native_width - 1))
+        target_y = max(0, min(target_y, self.native_height - 1))
+        return target_x, target_y
 
     def _handle_mouse_move(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
         try:
             coordinates = tool_input.get('coordinate', [0, 0])
             current_x, current_y = pyautogui.position()
-            # Get scale from config
             scale = float(self.config.get_setting('downscale_factor'))
+            target_x, target_y = self._to_native(coordinates)
             
-            # Calculate scaled coordinates based on scale factor
-            # Claude always provides coordinates for scaled resolution
-            target_x = float(coordinates[0]) * (1.0 / scale)  # Scale up
-            target_y = float(coordinates[1]) * (1.0 / scale)  # Scale up
-            
-            self.logger.add_entry("Debug", 
-                f"Mouse move: Claude({coordinates[0]}, {coordinates[1]}) -> "
-                f"Native({target_x:.0f}, {target_y:.0f}) "
-                f"[scale: {scale:.1f}, upscale: {1.0/scale:.1f}x]"
-            )
-
-            # Validate bounds
-            target_x = max(0, min(target_x, self.native_width - 1))
-            target_y = max(0, min(target_y, self.native_height - 1))
-            
-            # Move mouse
-            duration = 0 if self.config.get_setting('teleport_mouse', False) else 0.5
+            # Move mouse, taking longer for longer distances
+            duration = self.timer.move_duration((current_x, current_y), (target_x, target_y))
             pyautogui.moveTo(target_x, target_y, duration=duration)
             self.last_mouse_pos = (target_x, target_y)
             
@@ -184,10 +145,17 @@ class ActionHandler:
             self.logger.add_entry("Error", f"Mouse move failed: {str(e)}")
             return {"type": "error", "error": str(e)}
 
+    def _click_target(self, tool_input: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+        """Native target of a click that carries a fused move, or None to click in place"""
+        if tool_input.get('coordinate') is None:
+            return None
+        self.last_mouse_pos = self._to_native(tool_input['coordinate'])
+        return self.last_mouse_pos
+
     def _handle_left_click(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            # Get current mouse position
-            current_x, current_y = pyautogui.position()
+            # Click at the fused move target, else at the current mouse position
+            current_x, current_y = self._click_target(tool_input) or pyautogui.position()
             
             # Click at current position
             pyautogui.click(current_x, current_y)
@@ -203,6 +171,7 @@ class ActionHandler:
 
     def _handle_right_click(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
         try:
+            self._click_target(tool_input)
             if not self.last_mouse_pos:
                 return {"type": "error", "message": "No previous mouse position"}
             
@@ -219,6 +188,7 @@ class ActionHandler:
 
     def _handle_double_click(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
         try:
+            self._click_target(tool_input)
             if not self.last_mouse_pos:
                 return {"type": "error", "message": "No previous mouse position"}
             
@@ -233,6 +203,56 @@ class ActionHandler:
             self.logger.add_entry("Error", f"Double click failed: {str(e)}")
             return {"type": "error", "error": str(e)}
 
+    def _handle_middle_click(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            current_x, current_y = self._click_target(tool_input) or pyautogui.position()
+            pyautogui.middleClick(current_x, current_y)
+            self.logger.add_entry("System", f"Middle clicked at ({current_x}, {current_y})")
+            
+            return {
+                "type": "middle_click",
+                "position": [current_x, current_y]
+            }
+        except Exception as e:
+            self.logger.add_entry("Error", f"Middle click failed: {str(e)}")
+            return {"type": "error", "error": str(e)}
+
+    def _handle_left_click_drag(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Drag from the current cursor position to the given coordinate in one action"""
+        try:
+            start = pyautogui.position()
+            target_x, target_y = self._to_native(tool_input.get('coordinate', [0, 0]))
+            duration = self.timer.move_duration(start, (target_x, target_y))
+            pyautogui.mouseDown(start[0], start[1])
+            try:
+                pyautogui.moveTo(target_x, target_y, duration=duration)
+            finally:
+                pyautogui.mouseUp(target_x, target_y)
+            self.last_mouse_pos = (target_x, target_y)
+            self.logger.add_entry("System", f"Dragged from {tuple(start)} to ({target_x:.0f}, {target_y:.0f})")
+            
+            return {
+                "type": "drag",
+                "from": [start[0], start[1]],
+                "to": [target_x, target_y]
+            }
+        except Exception as e:
+            self.logger.add_entry("Error", f"Drag operation failed: {str(e)}")
+            return {"type": "error", "error": str(e)}
+
+    def _handle_cursor_position(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Report the cursor position in the scaled screenshot coordinates"""
+        try:
+            scale = float(self.config.get_setting('downscale_factor'))
+            x, y = pyautogui.position()
+            return {
+                "type": "cursor_position",
+                "coordinate": [round(x * scale), round(y * scale)]
+            }
+        except Exception as e:
+            self.logger.add_entry("Error", f"Cursor position failed: {str(e)}")
+            return {"type": "error", "error": str(e)}
+
     def _handle_drag(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
         try:
             if not self.is_dragging:
@@ -298,8 +318,11 @@ class ActionHandler:
             
             def switch_keyboard_layout():
                 """
-                Change Language Setting
+                Change Language Setting (per-character typing only)
                 """
+                # Change language setting if the current setting is different from the target.
+                if self.detect_current_language(text) == target_lang:
+                    return
                 if os_type == 'Windows':
                     if target_lang == 'ko':  # Korean
                         pyautogui.press('hangul')
@@ -320,20 +343,17 @@ class ActionHandler:
                 
                 time.sleep(0.2)
             
-            # Change language setting if the current setting is different from the target.
-            current_lang = self.detect_current_language(text) 
-            if current_lang != target_lang:
-                switch_keyboard_layout()
-            
-            # Write
-            pyautogui.write(text, interval=0.1)
-            self.logger.add_entry("System", f"Typed: {text} (Language: {target_lang})")
+            # Write: the text typed lands near the last click, so watch that area
+            focus = self.last_mouse_pos or tuple(pyautogui.position())
+            entry = self.text_entry.enter(text, focus=focus, switch_layout=switch_keyboard_layout)
+            self.logger.add_entry("System", f"Typed: {text} (Language: {target_lang}, via {entry['strategy']})")
             
             return {
                 "type": "type",
                 "text": text,
                 "language": target_lang,
-                "os": os_type
+                "os": os_type,
+                **entry
             }
         
         except Exception as e:
@@ -344,7 +364,11 @@ class ActionHandler:
     def _handle_key_press(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
         try:
             key = tool_input.get('text', '')
-            pyautogui.press(key)
+            if len(key) > 1 and '+' in key:
+                # Chords such as "ctrl+s" from computer tool calls
+                pyautogui.hotkey(*key.split('+'))
+            else:
+                pyautogui.press(key)
             self.logger.add_entry("System", f"Pressed key: {key}")
             
             return {
@@ -372,12 +396,22 @@ class ActionHandler:
     def _handle_wait(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
         try:
             duration = float(tool_input.get('duration', 1.0))
-            self.logger.add_entry("System", f"Waiting for {duration} seconds")
-            time.sleep(duration)
+            self.logger.add_entry("System", f"Waiting up to {duration} seconds for the screen to settle")
+            
+            # The requested duration is a cap; return early once the screen is stable,
+            # but give a reaction that has not started yet part of it to show up
+            if self.screenshot_manager is not None:
+                min_unchanged = duration * float(self.config.get_setting('settle_unchanged_fraction', 0.5))
+                settle = self.screenshot_manager.wait_until_stable(duration, min_unchanged=min_unchanged)
+                waited = settle["elapsed"]
+            else:
+                time.sleep(duration)
+                waited = duration
             
             return {
                 "type": "wait",
-                "duration": duration
+                "duration": duration,
+                "waited": round(waited, 2)
             }
         except Exception as e:
             self.logger.add_entry("Error", f"Wait failed: {str(e)}")
@@ -0,0 +1,109 @@
+# computeruse/core/action_optimizer.py
+import math
+from typing import List, Optional, Tuple
+from .action_parser import Action, Click, Drag, LeftClickDrag, MouseMove, TypeText, Wait
+from .action_timing import ActionTimer
+from .text_entry import estimate_seconds as estimate_type_seconds
+
+# Moves closer than this (in screenshot pixels) to the cursor are no-ops
+SAME_POSITION = 1.0
+
+
+class ActionOptimizer:
+    """Rewrites a parsed action plan into an equivalent, cheaper one before it runs.
+
+    - a move followed by a click becomes one click at the move target
+    - a move to where the cursor already is is dropped, unless a later action
+      reads the mouse position it records (see _position_needed)
+    - consecutive waits become one wait for their total duration
+    - consecutive type actions become one type action
+
+    Actions between the two halves of a text-format [drag] are left alone,
+    since the moves there trace the drag path.
+    """
+    def __init__(self, config, logger, timer: ActionTimer):
+        self.config = config
+        self.logger = logger
+        self.timer = timer
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config.get_setting('optimize_actions', True))
+
+    def optimize(self, actions: List[Action], cursor: Optional[Tuple[float, float]] = None,
+                 dragging: bool = False) -> List[Action]:
+        """Return the optimized plan; cursor is the current position in screenshot pixels"""
+        if not self.enabled or not actions:
+            return actions
+
+        start = cursor
+        optimized: List[Action] = []
+        for i, action in enumerate(actions):
+            previous = optimized[-1] if optimized else None
+            if isinstance(action, Drag):
+                dragging = not dragging
+            elif dragging:
+                pass
+            elif type(action) is MouseMove:
+                if (cursor is not None and self._same_position(action, cursor)
+                        and not self._position_needed(actions, i + 1)):
+                    continue
+            elif isinstance(action, Click) and action.x is None and type(previous) is MouseMove:
+                optimized[-1] = type(action)(action.line_number, x=previous.x, y=previous.y)
+                continue
+            elif isinstance(action, Wait) and isinstance(previous, Wait):
+                optimized[-1] = Wait(previous.seconds + action.seconds, previous.line_number)
+                continue
+            elif isinstance(action, TypeText) and isinstance(previous, TypeText):
+                optimized[-1] = TypeText(previous.text + action.text, previous.line_number)
+                continue
+
+            if type(action) in (MouseMove, LeftClickDrag) or (isinstance(action, Click) and action.x is not None):
+                cursor = (action.x, action.y)
+            optimized.append(action)
+
+        if len(optimized) != len(actions):
+            saved = self.estimate_seconds(actions, start) - self.estimate_seconds(optimized, start)
+            self.logger.add_entry("Debug",
+                f"Action plan optimized: {len(actions)} -> {len(optimized)} actions, ~{saved:.1f}s saved"
+            )
+        return optimized
+
+    @staticmethod
+    def _position_needed(actions: List[Action], start: int) -> bool:
+        """True if an action from start on reads the recorded mouse position before a move sets it.
+
+        Coordinate-less clicks and [drag] use ActionHandler.last_mouse_pos,
+        which only moves (or clicks carrying one) update, so a move there
+        has to run even when the cursor is already on target.
+        """
+        for action in actions[start:]:
+            if isinstance(action, Drag) or (isinstance(action, Click) and action.x is None):
+                return True
+            if isinstance(action, (MouseMove, Click)):
+                return False
+        return False
+
+    @staticmethod
+    def _same_position(move: MouseMove, cursor: Tuple[float, float]) -> bool:
+        return abs(move.x - cursor[0]) < SAME_POSITION and abs(move.y - cursor[1]) < SAME_POSITION
+
+    def estimate_seconds(self, actions: List[Action], cursor: Optional[Tuple[float, float]] = None) -> float:
+        """Rough fixed cost of running a plan: inter-action delays, mouse moves and typing"""
+        scale = float(self.config.get_setting('downscale_factor', 1.0)) or 1.0
+        total = 0.0
+        for action in actions:
+            total += self.timer.delay_after(action.kind)
+            if type(action) in (MouseMove, LeftClickDrag):
+                distance = None
+                if cursor is not None:
+                    # Screenshot pixels to native pixels
+                    distance = math.hypot(action.x - cursor[0], action.y - cursor[1]) / scale
+                total += self.timer.estimate_move(distance)
+            elif isinstance(action, TypeText):
+                total += estimate_type_seconds(action.text, self.config)
+            elif isinstance(action, Wait):
+                total += action.seconds
+            if getattr(action, 'x', None) is not None and not isinstance(action, Drag):
+                cursor = (action.x, action.y)
+        return total
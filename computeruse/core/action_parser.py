@@ -0,0 +1,286 @@
+# computeruse/core/action_parser.py
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# One numbered action per line, e.g. "3. [type]"Hello"" or "**4) [wait] 2s**".
+# The tag is matched case-insensitively; the argument keeps its original case.
+# Groups are (number, tag, arg); a missing tag comes back as ''.
+# Lines are anchored on a literal '\n' (the text is prefixed with one) because
+# the engine jumps between newlines, while a MULTILINE '^' is tried at every character.
+ACTION_LINE = re.compile(r'\n[ \t*\->`]*(\d+)[ \t]*[.)][ \t]*(?:\[([^\]\n]*)\])?([^\n]*)')
+# Markdown decoration and a stray CR left at the end of an argument
+ARG_TRAILER = ' \t*`\r'
+COMPLETED = re.compile(r'\[\s*completed\s*\]', re.IGNORECASE)
+NUMBER = r'[-+]?\d+(?:\.\d+)?'
+COORDINATE = re.compile(rf'({NUMBER})\s*,\s*({NUMBER})')
+SCALAR = re.compile(NUMBER)
+
+
+class Action:
+    """Typed record for one parsed action; 'kind' is the ActionHandler action name"""
+    __slots__ = ('line_number',)
+    kind = ''
+
+    def __init__(self, line_number: int = 0):
+        self.line_number = line_number
+
+    def tool_input(self) -> Dict[str, Any]:
+        return {}
+
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and self.tool_input() == other.tool_input()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.tool_input()})"
+
+
+class Screenshot(Action):
+    __slots__ = ()
+    kind = 'screenshot'
+
+
+class Click(Action):
+    """Click at the cursor, or at (x, y) once a preceding move has been fused into it"""
+    __slots__ = ('x', 'y')
+
+    def __init__(self, line_number: int = 0, x: Optional[float] = None, y: Optional[float] = None):
+        self.line_number = line_number
+        self.x = x
+        self.y = y
+
+    def tool_input(self) -> Dict[str, Any]:
+        return {} if self.x is None else {'coordinate': [self.x, self.y]}
+
+
+class LeftClick(Click):
+    __slots__ = ()
+    kind = 'left_click'
+
+
+class DoubleClick(Click):
+    __slots__ = ()
+    kind = 'double_click'
+
+
+class RightClick(Click):
+    __slots__ = ()
+    kind = 'right_click'
+
+
+class MouseMove(Action):
+    __slots__ = ('x', 'y')
+    kind = 'mouse_move'
+
+    def __init__(self, x: float, y: float, line_number: int = 0):
+        self.line_number = line_number
+        self.x = x
+        self.y = y
+
+    def tool_input(self) -> Dict[str, Any]:
+        return {'coordinate': [self.x, self.y]}
+
+
+class Drag(MouseMove):
+    __slots__ = ()
+    kind = 'drag'
+
+
+class LeftClickDrag(MouseMove):
+    """Press at the cursor, move to (x, y) and release; from computer tool calls"""
+    __slots__ = ()
+    kind = 'left_click_drag'
+
+
+class MiddleClick(Click):
+    __slots__ = ()
+    kind = 'middle_click'
+
+
+class CursorPosition(Action):
+    __slots__ = ()
+    kind = 'cursor_position'
+
+
+class Scroll(Action):
+    __slots__ = ('amount',)
+    kind = 'mouse_scroll'
+
+    def __init__(self, amount: int, line_number: int = 0):
+        self.line_number = line_number
+        self.amount = amount
+
+    def tool_input(self) -> Dict[str, Any]:
+        return {'amount': self.amount}
+
+
+class TypeText(Action):
+    __slots__ = ('text',)
+    kind = 'type'
+
+    def __init__(self, text: str, line_number: int = 0):
+        self.line_number = line_number
+        self.text = text
+
+    def tool_input(self) -> Dict[str, Any]:
+        return {'text': self.text}
+
+
+class KeyPress(Action):
+    __slots__ = ('key',)
+    kind = 'key_press'
+
+    def __init__(self, key: str, line_number: int = 0):
+        self.line_number = line_number
+        self.key = key
+
+    def tool_input(self) -> Dict[str, Any]:
+        return {'text': self.key}
+
+
+class Wait(Action):
+    __slots__ = ('seconds',)
+    kind = 'wait'
+
+    def __init__(self, seconds: float, line_number: int = 0):
+        self.line_number = line_number
+        self.seconds = seconds
+
+    def tool_input(self) -> Dict[str, Any]:
+        return {'duration': self.seconds}
+
+
+class ParseError:
+    """A numbered line that could not be turned into an action"""
+    __slots__ = ('line_number', 'line', 'message')
+
+    def __init__(self, line_number: int, line: str, message: str):
+        self.line_number = line_number
+        self.line = line
+        self.message = message
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"line": self.line_number, "text": self.line, "error": self.message}
+
+    def __repr__(self) -> str:
+        return f"ParseError({self.line_number}, {self.line!r}, {self.message!r})"
+
+
+class ParseResult:
+    __slots__ = ('actions', 'errors', 'completed')
+
+    def __init__(self):
+        self.actions: List[Action] = []
+        self.errors: List[ParseError] = []
+        self.completed = False
+
+
+def _strip_brackets(arg: str) -> str:
+    arg = arg.strip()
+    if len(arg) >= 2 and arg[0] in '<"\'' and arg[-1] in '>"\'':
+        return arg[1:-1].strip()
+    return arg
+
+
+def _coordinate(arg: str) -> List[float]:
+    match = COORDINATE.search(arg)
+    if not match:
+        raise ValueError(f"expected <x,y> coordinates, got '{arg.rstrip(ARG_TRAILER)}'")
+    return [float(match.group(1)), float(match.group(2))]
+
+
+def _scalar(arg: str) -> float:
+    match = SCALAR.search(arg)
+    if not match:
+        raise ValueError(f"expected a number, got '{arg.rstrip(ARG_TRAILER)}'")
+    return float(match.group(0))
+
+
+def _text(arg: str) -> str:
+    arg = arg.strip().rstrip(ARG_TRAILER)
+    first = arg[:1]
+    # Quoted text runs to the last quote so embedded quotes survive
+    if first == '"' or first == "'":
+        end = arg.rfind(first)
+        if end > 0:
+            return arg[1:end]
+    elif first == '<' and arg.endswith('>'):
+        return arg[1:-1]
+    return arg
+
+
+def _key(arg: str) -> str:
+    key = _strip_brackets(arg.rstrip(ARG_TRAILER))
+    if not key:
+        raise ValueError("missing key name")
+    # Named keys are lowercase in pyautogui; a single character keeps its case
+    return key if len(key) == 1 else key.lower()
+
+
+# How a tag's argument is read
+NO_ARG, COORDINATE_ARG, INT_ARG, NUMBER_ARG, TEXT_ARG, KEY_ARG = range(6)
+# Tag -> (record class, argument kind)
+TAGS: Dict[str, Tuple[type, int]] = {
+    'move': (MouseMove, COORDINATE_ARG),
+    'drag': (Drag, COORDINATE_ARG),
+    'click': (LeftClick, NO_ARG),
+    'double_click': (DoubleClick, NO_ARG),
+    'right_click': (RightClick, NO_ARG),
+    'screenshot': (Screenshot, NO_ARG),
+    'mouse_scroll': (Scroll, INT_ARG),
+    'type': (TypeText, TEXT_ARG),
+    'key_press': (KeyPress, KEY_ARG),
+    'wait': (Wait, NUMBER_ARG),
+}
+
+
+def _parse_groups(number: str, tag: str, arg: str) -> Union[Action, ParseError]:
+    line_number = int(number)
+    spec = TAGS.get(tag)
+    if spec is None:
+        # Slow path: tolerate "[Left Click]"-style spacing and case
+        spec = TAGS.get(tag.strip().lower().replace(' ', '_'))
+    try:
+        if spec is None:
+            raise ValueError(f"unknown action [{tag}]" if tag else "missing [action] tag")
+        record, arg_kind = spec
+        if arg_kind == NO_ARG:
+            return record(line_number)
+        if arg_kind == COORDINATE_ARG:
+            x, y = _coordinate(arg)
+            return record(x, y, line_number)
+        if arg_kind == TEXT_ARG:
+            return record(_text(arg), line_number)
+        if arg_kind == KEY_ARG:
+            return record(_key(arg), line_number)
+        if arg_kind == INT_ARG:
+            return record(int(_scalar(arg)), line_number)
+        return record(_scalar(arg), line_number)
+    except ValueError as e:
+        line = f"{number}. [{tag}]{arg}" if tag else f"{number}. {arg}"
+        return ParseError(line_number, line.rstrip(ARG_TRAILER), str(e))
+
+
+def parse_actions(text: str) -> ParseResult:
+    """Parse a reply in a single pass over its numbered lines.
+
+    Lines that fail to parse are recorded as errors and skipped; the rest
+    of the plan is still returned.
+    """
+    result = ParseResult()
+    if COMPLETED.search(text):
+        result.completed = True
+        return result
+    actions, errors = result.actions, result.errors
+    for groups in ACTION_LINE.findall('\n' + text):
+        parsed = _parse_groups(*groups)
+        if type(parsed) is ParseError:
+            errors.append(parsed)
+        else:
+            actions.append(parsed)
+    return result
+
+
+def parse_action_line(line: str) -> Optional[Union[Action, ParseError]]:
+    """Parse one complete line; None if it is not a numbered action line"""
+    match = ACTION_LINE.match('\n' + line.rstrip('\r\n'))
+    return _parse_groups(*match.groups('')) if match else None
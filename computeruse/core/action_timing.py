@@ -0,0 +1,142 @@
+# computeruse/core/action_timing.py
+import math
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Per profile: seconds to leave after an action of each kind before the next
+# one starts, and how mouse move durations scale with distance.
+TIMING_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Roughly the old fixed timing (0.5s between actions, 0.5s moves), for slow machines
+    'careful': {
+        'delays': {'screenshot': 0.0, 'cursor_position': 0.0, 'wait': 0.0},
+        'default_delay': 0.5,
+        'move_speed': 0.0,
+        'move_min': 0.5,
+        'move_max': 0.5
+    },
+    'normal': {
+        'delays': {
+            'mouse_move': 0.05,
+            'left_click': 0.25,
+            'double_click': 0.25,
+            'right_click': 0.25,
+            'middle_click': 0.25,
+            'left_click_drag': 0.2,
+            'drag': 0.1,
+            'type': 0.15,
+            'key_press': 0.2,
+            'mouse_scroll': 0.15,
+            'screenshot': 0.0,
+            'cursor_position': 0.0,
+            'wait': 0.0
+        },
+        'default_delay': 0.1,
+        'move_speed': 3000.0,
+        'move_min': 0.05,
+        'move_max': 0.35
+    },
+    # For VMs and remote desktops where the UI keeps up: near-zero gaps, instant moves
+    'turbo': {
+        'delays': {
+            'left_click': 0.05,
+            'double_click': 0.05,
+            'right_click': 0.05,
+            'middle_click': 0.05,
+            'key_press': 0.05,
+            'type': 0.03
+        },
+        'default_delay': 0.0,
+        'move_speed': 0.0,
+        'move_min': 0.0,
+        'move_max': 0.0
+    }
+}
+
+
+class ActionTimer:
+    """Owns every fixed delay between actions.
+
+    Before an action starts, wait_before() sleeps only for what is left of
+    the delay owed to the previous action's kind, so time spent elsewhere
+    (parsing, logging, encoding) counts toward it. Mouse moves get a
+    duration proportional to their distance instead of a fixed one.
+    pyautogui.PAUSE is expected to be 0 so nothing else adds sleeps.
+    """
+    def __init__(self, config, logger):
+        self.config = config
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._last_kind: Optional[str] = None
+        self._last_end = 0.0
+        self.reset_stats()
+
+    @property
+    def profile_name(self) -> str:
+        name = self.config.get_setting('timing_profile', 'normal')
+        return name if name in TIMING_PROFILES else 'normal'
+
+    @property
+    def profile(self) -> Dict[str, Any]:
+        return TIMING_PROFILES[self.profile_name]
+
+    def delay_after(self, kind: str) -> float:
+        """Seconds to leave after an action of this kind"""
+        profile = self.profile
+        overrides = self.config.get_setting('action_delays', None) or {}
+        delay = overrides.get(kind, profile['delays'].get(kind, profile['default_delay']))
+        return max(float(delay), float(self.config.get_setting('min_action_delay', 0.0) or 0.0))
+
+    def wait_before(self, kind: str) -> float:
+        """Sleep for what remains of the previous action's delay; returns the seconds slept"""
+        with self._lock:
+            if self._last_kind is None:
+                return 0.0
+            remaining = self._last_end + self.delay_after(self._last_kind) - time.perf_counter()
+        if remaining <= 0:
+            return 0.0
+        time.sleep(remaining)
+        with self._lock:
+            self._stats["delay_s"] += remaining
+        return remaining
+
+    def done(self, kind: str) -> None:
+        """Record that an action of this kind just finished"""
+        with self._lock:
+            self._last_kind = kind
+            self._last_end = time.perf_counter()
+            self._stats["actions"] += 1
+
+    def move_duration(self, start: Tuple[float, float], end: Tuple[float, float]) -> float:
+        """Duration of a mouse move in native pixels, proportional to its distance"""
+        if self.config.get_setting('teleport_mouse', False):
+            return 0.0
+        profile = self.profile
+        distance = math.hypot(end[0] - start[0], end[1] - start[1])
+        if distance < 1 or profile['move_max'] <= 0:
+            return 0.0
+        speed = profile['move_speed']
+        duration = distance / speed if speed > 0 else profile['move_max']
+        duration = min(max(duration, profile['move_min']), profile['move_max'])
+        with self._lock:
+            self._stats["move_s"] += duration
+        return duration
+
+    def estimate_move(self, distance: Optional[float]) -> float:
+        """Expected move duration for a distance in native pixels; the maximum if unknown"""
+        if self.config.get_setting('teleport_mouse', False):
+            return 0.0
+        profile = self.profile
+        if distance is None or profile['move_speed'] <= 0:
+            return profile['move_max']
+        if distance < 1:
+            return 0.0
+        return min(max(distance / profile['move_speed'], profile['move_min']), profile['move_max'])
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = {"actions": 0, "delay_s": 0.0, "move_s": 0.0}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, profile=self.profile_name)
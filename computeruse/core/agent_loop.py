@@ -0,0 +1,62 @@
+from dataclasses import dataclass, field
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import time
+from .action_parser import Action, ParseError
+from .tool_use import ToolCall
+
+# computeruse/core/agent_loop.py
+# Hook phases fired for every step, in order
+STEP_PHASES = ('step_start', 'parsed', 'actions_done', 'captured', 'step_end')
+
+
+@dataclass
+class StepState:
+    """State of one agent loop iteration; dropped when the step finishes"""
+    iteration: int
+    response: Any = None
+    text: str = ""
+    actions: List[Action] = field(default_factory=list)
+    parse_errors: List[ParseError] = field(default_factory=list)
+    # tool_use blocks of the reply when actions come from computer tool calls
+    tool_calls: List[ToolCall] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    next_message: Optional[Dict[str, Any]] = None
+    completed: bool = False
+    # True when the actions already ran while the response was streaming
+    executed: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        """Accumulate the wall time of a block under timings[name]"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def timing_summary(self) -> str:
+        return ", ".join(f"{name}: {seconds:.2f}s" for name, seconds in self.timings.items())
+
+
+StepHook = Callable[[str, StepState], None]
+
+
+class LineBuffer:
+    """Splits streamed text deltas into complete lines"""
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """Add a text delta and return the lines it completed"""
+        self._pending += delta
+        if "\n" not in self._pending:
+            return []
+        *lines, self._pending = self._pending.split("\n")
+        return lines
+
+    def flush(self) -> List[str]:
+        """Return the trailing partial line once the stream has ended"""
+        pending, self._pending = self._pending, ""
+        return [pending] if pending else []
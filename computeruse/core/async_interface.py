@@ -0,0 +1,254 @@
+# computeruse/core/async_interface.py
+import asyncio
+import inspect
+from typing import Optional, Dict, List, Any
+from .interface import Interface
+from .agent_loop import StepState
+from .client_factory import aprewarm, async_http_client, create_async_client
+
+class AsyncInterface(Interface):
+    """Interface variant whose agent loop runs on asyncio.
+
+    The step logic is shared with Interface; only the I/O boundary
+    (executing actions, capturing, requesting) is overridden here. API
+    calls go through AsyncAnthropic, while blocking work (pyautogui
+    actions, screen polling, JPEG encoding) runs in worker threads so the
+    event loop stays free. Capture encoding and the settle wait run as
+    concurrent tasks.
+
+    stop_processing() cancels the await the task is blocked on, which ends
+    API calls right away. Work already handed to a thread is not
+    interrupted: a running batch of actions stops at its next should_stop
+    check, and the settle wait at its next poll, in the background.
+    """
+    def __init__(self, config, logger):
+        super().__init__(config, logger)
+        self.async_client = None
+        self._api_key: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._prewarm_task: Optional[asyncio.Task] = None
+
+    def initialize_anthropic(self, api_key: str) -> bool:
+        """Initialize the sync client; the async client is built per run_task() call"""
+        result = super().initialize_anthropic(api_key)
+        self._api_key = api_key
+        return result
+
+    def _open_async_client(self) -> None:
+        """Build an AsyncAnthropic client on a pool bound to the running loop"""
+        http_client = async_http_client(self.config)
+        self.async_client = create_async_client(self.config, self._api_key, http_client)
+        if self.config.get_setting('prewarm_connection', True):
+            # The TLS handshake overlaps with the first screenshot capture
+            self._prewarm_task = asyncio.create_task(aprewarm(self.async_client, http_client, self.logger))
+
+    async def _close_async_client(self) -> None:
+        client, self.async_client = self.async_client, None
+        try:
+            await client.close()
+        except Exception as e:
+            self.logger.add_entry("Debug", f"Closing async client failed: {str(e)}")
+
+    def stop_processing(self) -> None:
+        """Stop current processing and cancel the in-flight await, if any"""
+        super().stop_processing()
+        task, loop = self._task, self._loop
+        if task is not None and loop is not None and not task.done():
+            loop.call_soon_threadsafe(task.cancel)
+
+    async def run_task(self, initial_text: str) -> None:
+        """Send the opening message and drive the loop until the task ends"""
+        self._task = asyncio.current_task()
+        self._loop = asyncio.get_running_loop()
+        owns_client = self._api_key is not None
+        if owns_client:
+            self._open_async_client()
+        try:
+            initial_message = await asyncio.to_thread(self.create_message_with_screenshot, initial_text)
+            self.conversation_history.append(initial_message)
+            with self._prefetching():
+                response = await self._acreate_message([initial_message], max_tokens=2048)
+            self.logger.add_entry("Debug", "Received response from Claude")
+            await self.aprocess_response(response)
+        except asyncio.CancelledError:
+            self.logger.add_entry("System", "Task stopped by user")
+            self.task_complete = True
+        finally:
+            if owns_client:
+                await self._close_async_client()
+            self._task = None
+            self._loop = None
+
+    async def aprocess_response(self, response) -> None:
+        """Async counterpart of process_response"""
+        next_step = self._next_step(response)
+        try:
+            while next_step is not None and self._begin_iteration(next_step):
+                step, next_step = next_step, None
+                next_step = await self._arun_step(step)
+                self._end_iteration(step)
+                del step
+
+        except Exception as e:
+            self.logger.add_entry("Error", f"Error processing response: {str(e)}")
+            self.task_complete = True
+        finally:
+            self._log_request_metrics()
+
+    async def _arun_step(self, step: StepState) -> Optional[StepState]:
+        """Async counterpart of _run_step"""
+        plan = self._prepare_step(step)
+        if plan is None:
+            return None
+        execute, needs_screenshot = plan
+
+        with step.timed('actions'):
+            if execute is not None:
+                await asyncio.to_thread(execute, step)
+        self._run_hooks('actions_done', step)
+
+        capture = self._capture_mode(step, needs_screenshot)
+        if capture is not None:
+            with step.timed('capture'):
+                if capture == 'settled':
+                    self._log_capture(await self._acapture_settled(self.get_wait_time()))
+                else:
+                    await asyncio.to_thread(self.screenshot_manager.take_screenshot)
+        self._run_hooks('captured', step)
+
+        if self.should_stop:
+            return None
+
+        await asyncio.to_thread(self._append_next_message, step)
+
+        with step.timed('api'):
+            if self._streaming():
+                return await self._astream_next_step()
+            with self._prefetching():
+                response = await self._arequest_next_response()
+        self._record_api_time(step.timings['api'])
+        return self._next_step(response)
+
+    async def _acapture_settled(self, settle_time: float) -> Dict:
+        """Encode an early frame and wait for the screen to settle as concurrent tasks"""
+        manager = self.screenshot_manager
+        should_stop = lambda: self.should_stop
+        # Read before the early capture below replaces it
+        baseline = manager.settle_baseline()
+        if not self.config.get_setting('pipelined_capture', True):
+            await asyncio.to_thread(manager.wait_until_stable, settle_time, should_stop, baseline)
+            return await asyncio.to_thread(manager.take_screenshot)
+
+        early_result, _ = await asyncio.gather(
+            asyncio.wrap_future(manager.capture_async()),
+            asyncio.to_thread(manager.wait_until_stable, settle_time, should_stop, baseline)
+        )
+        result = await asyncio.to_thread(manager.take_screenshot)
+        if early_result.get("type") != "error" and result.get("type") == "screenshot_unchanged":
+            return dict(early_result, frame_id=result["frame_id"])
+        return result
+
+    async def _astream_next_step(self) -> Optional[StepState]:
+        """Async counterpart of _stream_next_step"""
+        step = StepState(iteration=0, executed=True)
+        combined_results: List[Dict[str, Any]] = []
+
+        try:
+            request = await asyncio.to_thread(self._build_request, self.conversation_history, 512)
+            cache_key, cached = await asyncio.to_thread(self._cached_response, request)
+            if cached is not None:
+                return self._next_step(cached)
+            consume = self._aconsume_tool_stream if self.uses_tool_calls() else self._aconsume_stream
+            await self.request_scheduler.acall(
+                lambda: consume(step, request, combined_results),
+                estimated_tokens=self._estimate_request_tokens(self.conversation_history),
+                can_retry=lambda: not step.actions
+            )
+        except Exception as api_error:
+            if not self._is_safety_refusal(api_error) or step.actions:
+                raise
+            return self._next_step(await self._arequest_next_response())
+
+        self._finish_streamed_step(step, combined_results)
+        if cache_key:
+            await asyncio.to_thread(self.response_cache.put, cache_key, step.response)
+        return step
+
+    async def _aconsume_stream(self, step: StepState, request: Dict[str, Any],
+                               combined_results: List[Dict[str, Any]]) -> Any:
+        """Async counterpart of _consume_stream"""
+        buffer = self._start_text_stream(step)
+        try:
+            async with self.async_client.beta.messages.stream(**request) as stream:
+                self._stream_opened(stream)
+                async for delta in stream.text_stream:
+                    for line in buffer.feed(delta):
+                        await asyncio.to_thread(self._handle_streamed_line, step, line, combined_results)
+                for line in buffer.flush():
+                    await asyncio.to_thread(self._handle_streamed_line, step, line, combined_results)
+                step.response = await stream.get_final_message()
+        except Exception as e:
+            self._check_authentication(e)
+            raise
+        return step.response
+
+    async def _aconsume_tool_stream(self, step: StepState, request: Dict[str, Any],
+                                    combined_results: List[Dict[str, Any]]) -> Any:
+        """Async counterpart of _consume_tool_stream"""
+        step.tool_calls = []
+        try:
+            async with self.async_client.beta.messages.stream(**request) as stream:
+                self._stream_opened(stream)
+                async for event in stream:
+                    block = self._completed_tool_block(event)
+                    if block is not None:
+                        await asyncio.to_thread(self._run_streamed_tool_call, step, block)
+                step.response = await stream.get_final_message()
+        except Exception as e:
+            self._check_authentication(e)
+            raise
+        await asyncio.to_thread(self._run_remaining_tool_calls, step)
+        return step.response
+
+    async def _arequest_next_response(self) -> Any:
+        """Send the conversation, retrying without images on a safety refusal"""
+        try:
+            return await self._acreate_message(self.conversation_history, max_tokens=512)
+        except Exception as api_error:
+            if not self._is_safety_refusal(api_error):
+                raise
+            if self.should_stop:
+                return None
+            self.logger.add_entry("System", "Retrying without screenshot...")
+            return await self._acreate_message(self._text_only(self.conversation_history), max_tokens=1024)
+
+    async def _acreate_message(self, messages: List[Dict], max_tokens: int) -> Any:
+        """Send one computer-use API call through AsyncAnthropic"""
+        if not self.async_client:
+            raise Exception("Anthropic client not initialized")
+        # Materializing base64 payloads is CPU work; keep it off the event loop
+        request = await asyncio.to_thread(self._build_request, messages, max_tokens)
+        # Hashing and the lookup touch images and disk as well
+        cache_key, cached = await asyncio.to_thread(self._cached_response, request)
+        if cached is not None:
+            return cached
+        response = await self.request_scheduler.acall(
+            lambda: self._asend_request(request),
+            estimated_tokens=self._estimate_request_tokens(messages)
+        )
+        self._log_usage(response)
+        if cache_key:
+            await asyncio.to_thread(self.response_cache.put, cache_key, response)
+        return response
+
+    async def _asend_request(self, request: Dict[str, Any]) -> Any:
+        """Send one request, recording its rate-limit headers"""
+        try:
+            raw = await self.async_client.beta.messages.with_raw_response.create(**request)
+        except Exception as e:
+            self._check_authentication(e)
+            raise
+        response = self._received(raw).parse()
+        # parse() is a coroutine on newer SDK versions
+        return await response if inspect.isawaitable(response) else response
@@ -0,0 +1,121 @@
+# computeruse/core/client_factory.py
+import threading
+from typing import Any, Optional, Tuple
+from anthropic import (
+    DEFAULT_CONNECTION_LIMITS, Anthropic, AsyncAnthropic, DefaultAsyncHttpxClient, DefaultHttpxClient, Timeout
+)
+
+API_KEY_PREFIX = "sk-ant-"
+MIN_API_KEY_LENGTH = 40
+# The SDK's own connection limits class, whichever HTTP library version it is built on
+Limits = type(DEFAULT_CONNECTION_LIMITS)
+
+_shared_http_client: Optional[DefaultHttpxClient] = None
+_shared_http_settings: Optional[Tuple] = None
+_shared_lock = threading.Lock()
+
+
+def check_api_key_format(api_key: str) -> None:
+    """Reject keys that cannot be valid without calling the API.
+
+    Whether the key is actually accepted is checked lazily by the first
+    real request.
+    """
+    if not api_key or not api_key.strip():
+        raise ValueError("API key is empty")
+    if api_key != api_key.strip() or any(c.isspace() for c in api_key):
+        raise ValueError("API key contains whitespace")
+    if not api_key.startswith(API_KEY_PREFIX) or len(api_key) < MIN_API_KEY_LENGTH:
+        raise ValueError(f"API key does not look like an Anthropic key ('{API_KEY_PREFIX}...')")
+
+
+def api_base_url(config) -> Optional[str]:
+    """API endpoint override, e.g. a local mock server; None uses the SDK default"""
+    return config.get_setting('api_base_url') or None
+
+
+def _http_settings(config) -> Tuple[Timeout, Any]:
+    timeout = Timeout(
+        connect=float(config.get_setting('http_connect_timeout', 5.0)),
+        read=float(config.get_setting('http_read_timeout', 120.0)),
+        write=float(config.get_setting('http_write_timeout', 30.0)),
+        pool=float(config.get_setting('http_pool_timeout', 10.0))
+    )
+    limits = Limits(
+        max_connections=int(config.get_setting('http_max_connections', 10)),
+        max_keepalive_connections=int(config.get_setting('http_keepalive_connections', 5)),
+        keepalive_expiry=float(config.get_setting('http_keepalive_expiry', 60.0))
+    )
+    return timeout, limits
+
+
+def shared_http_client(config) -> DefaultHttpxClient:
+    """Return the process-wide keep-alive pool.
+
+    A new pool is created if the HTTP settings changed; clients built on
+    the previous one keep using it.
+    """
+    global _shared_http_client, _shared_http_settings
+    timeout, limits = _http_settings(config)
+    settings = (repr(timeout), repr(limits))
+    with _shared_lock:
+        if _shared_http_client is None or _shared_http_client.is_closed or _shared_http_settings != settings:
+            _shared_http_client = DefaultHttpxClient(timeout=timeout, limits=limits)
+            _shared_http_settings = settings
+        return _shared_http_client
+
+
+def create_client(config, api_key: str) -> Anthropic:
+    """Build a sync client on the shared pool; retries are left to the request scheduler"""
+    timeout, _ = _http_settings(config)
+    return Anthropic(
+        api_key=api_key,
+        base_url=api_base_url(config),
+        http_client=shared_http_client(config),
+        timeout=timeout,
+        max_retries=0
+    )
+
+
+def async_http_client(config) -> DefaultAsyncHttpxClient:
+    """Build a keep-alive pool for one event loop; async pools cannot be shared across loops"""
+    timeout, limits = _http_settings(config)
+    return DefaultAsyncHttpxClient(timeout=timeout, limits=limits)
+
+
+def create_async_client(config, api_key: str, http_client: DefaultAsyncHttpxClient) -> AsyncAnthropic:
+    """Build an async client on the given pool; retries are left to the request scheduler"""
+    timeout, _ = _http_settings(config)
+    return AsyncAnthropic(
+        api_key=api_key,
+        base_url=api_base_url(config),
+        http_client=http_client,
+        timeout=timeout,
+        max_retries=0
+    )
+
+
+def prewarm(config, client: Anthropic, logger) -> threading.Thread:
+    """Open a pooled connection to the API host in the background.
+
+    Any HTTP response (even a 404) leaves a TLS connection in the
+    keep-alive pool, so the first real request skips the handshake.
+    """
+    def warm() -> None:
+        try:
+            shared_http_client(config).head(str(client.base_url), timeout=5.0)
+            logger.add_entry("Debug", f"Pre-warmed connection to {client.base_url}")
+        except Exception as e:
+            logger.add_entry("Debug", f"Connection pre-warm failed: {str(e)}")
+    thread = threading.Thread(target=warm, daemon=True)
+    thread.start()
+    return thread
+
+
+async def aprewarm(client: AsyncAnthropic, http_client: DefaultAsyncHttpxClient, logger) -> None:
+    """Async counterpart of prewarm() for an async client's pool"""
+    try:
+        await http_client.head(str(client.base_url), timeout=5.0)
+        logger.add_entry("Debug", f"Pre-warmed connection to {client.base_url}")
+    except Exception as e:
+        logger.add_entry("Debug", f"Connection pre-warm failed: {str(e)}")
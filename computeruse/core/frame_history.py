@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import mmap
+import tempfile
+import threading
+
+# computeruse/core/frame_history.py
+class FrameHistory:
+    """Screenshot payload store with an in-memory LRU that spills to disk.
+
+    Recent payloads stay in memory; older ones are appended to a temporary
+    segment file and read back through a read-only memory map, so memory
+    stays flat however many frames a task produces.
+    """
+    def __init__(self, config, logger):
+        self.config = config
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[int, bytes]" = OrderedDict()
+        self._index: Dict[int, Tuple[int, int]] = {}
+        self._next_ref = 1
+
+        # Spill segment, created on first eviction
+        self._segment = None
+        self._segment_size = 0
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+
+    @property
+    def max_in_memory(self) -> int:
+        return max(1, int(self.config.get_setting('history_frames_in_memory', 8)))
+
+    def put(self, data: bytes) -> int:
+        """Store a payload and return its reference id"""
+        with self._lock:
+            ref = self._next_ref
+            self._next_ref += 1
+            self._memory[ref] = bytes(data)
+            self._evict()
+            return ref
+
+    def get(self, ref: int) -> bytes:
+        """Return the payload for a reference id, from memory or the spill file"""
+        with self._lock:
+            if ref in self._memory:
+                self._memory.move_to_end(ref)
+                return self._memory[ref]
+            if ref not in self._index:
+                raise KeyError(f"Unknown frame reference: {ref}")
+
+            offset, length = self._index[ref]
+            if self._map is None or self._mapped_size < offset + length:
+                self._remap()
+            data = self._map[offset:offset + length]
+
+            # Promote back into the LRU; it is already on disk, so evicting
+            # it again costs nothing
+            self._memory[ref] = data
+            self._evict()
+            return data
+
+    def stats(self) -> Dict[str, int]:
+        """Report how many payloads are held in memory and on disk"""
+        with self._lock:
+            return {
+                "in_memory": len(self._memory),
+                "memory_bytes": sum(len(data) for data in self._memory.values()),
+                "spilled": len(self._index),
+                "spill_bytes": self._segment_size
+            }
+
+    def clear(self) -> None:
+        """Drop all payloads and truncate the spill file"""
+        with self._lock:
+            self._memory.clear()
+            self._index.clear()
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+                self._mapped_size = 0
+            if self._segment is not None:
+                self._segment.seek(0)
+                self._segment.truncate()
+                self._segment_size = 0
+
+    def close(self) -> None:
+        """Release the memory map and delete the spill file"""
+        self.clear()
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    def _evict(self) -> None:
+        while len(self._memory) > self.max_in_memory:
+            ref, data = self._memory.popitem(last=False)
+            if ref not in self._index:
+                self._spill(ref, data)
+
+    def _spill(self, ref: int, data: bytes) -> None:
+        if self._segment is None:
+            self._segment = tempfile.TemporaryFile(
+                prefix="computeruse-frames-",
+                dir=self.config.get_setting('history_spill_dir') or None
+            )
+        self._segment.seek(self._segment_size)
+        self._segment.write(data)
+        self._segment.flush()
+        self._index[ref] = (self._segment_size, len(data))
+        self._segment_size += len(data)
+
+    def _remap(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._segment.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped_size = self._segment_size
@@ -0,0 +1,183 @@
+import json
+from typing import Any, Dict, List, Optional
+
+# computeruse/core/history_manager.py
+# Rough text cost used for budgeting; the API reports exact counts afterwards
+CHARS_PER_TOKEN = 4
+
+
+def estimate_block_tokens(block: Dict[str, Any]) -> int:
+    """Estimate the input tokens of one content block"""
+    if block.get("type") == "text":
+        return len(block.get("text", "")) // CHARS_PER_TOKEN + 1
+    if block.get("type") == "image":
+        # frame_ref sources carry their own estimate; 1600 is the API ceiling
+        return int(block.get("source", {}).get("tokens", 1600))
+    if block.get("type") == "tool_use":
+        return len(json.dumps(block.get("input", {}))) // CHARS_PER_TOKEN + 1
+    if block.get("type") == "tool_result" and isinstance(block.get("content"), list):
+        return sum(estimate_block_tokens(b) for b in block["content"] if isinstance(b, dict)) + 1
+    return 0
+
+
+def estimate_message_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Estimate the input tokens of a message list"""
+    total = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            total += len(content) // CHARS_PER_TOKEN + 1
+        elif isinstance(content, list):
+            total += sum(estimate_block_tokens(block) for block in content if isinstance(block, dict))
+    return total
+
+
+def _image_placeholder(block: Dict[str, Any]) -> Dict[str, Any]:
+    source = block.get("source", {})
+    frame_id = source.get("frame_id")
+    label = f"frame #{frame_id}" if frame_id is not None else "an earlier image"
+    return {"type": "text", "text": f"[Screenshot {label} omitted from history]"}
+
+
+def _nested_blocks(block: Any) -> List[Dict[str, Any]]:
+    """A block followed by the blocks inside it (tool_result content)"""
+    if not isinstance(block, dict):
+        return []
+    if block.get("type") == "tool_result" and isinstance(block.get("content"), list):
+        return [block] + [b for b in block["content"] if isinstance(b, dict)]
+    return [block]
+
+
+def _replace_images(blocks: List[Any]) -> List[Any]:
+    replaced = []
+    for block in blocks:
+        if isinstance(block, dict) and block.get("type") == "image":
+            block = _image_placeholder(block)
+        elif isinstance(block, dict) and block.get("type") == "tool_result" and isinstance(block.get("content"), list):
+            block = dict(block, content=_replace_images(block["content"]))
+        replaced.append(block)
+    return replaced
+
+
+class HistoryPolicy:
+    """Transforms the message list sent with a request without touching the stored history"""
+    def apply(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class ImageWindowPolicy(HistoryPolicy):
+    """Keep images of the last K image-bearing messages; older ones become placeholders.
+
+    Images from the newest full frame onwards are always kept, so region
+    crops sent after it still have the frame they are relative to.
+    Images leave the window 'step' at a time (so K to K+step-1 are kept):
+    between drops the placeholdered prefix stays byte-identical and the
+    previous request's cache entry can be read.
+    """
+    def __init__(self, keep_images: int = 3, step: int = 1):
+        self.keep_images = max(1, int(keep_images))
+        self.step = max(1, int(step))
+
+    @staticmethod
+    def _images(message: Dict[str, Any]) -> List[Dict[str, Any]]:
+        content = message.get("content")
+        if not isinstance(content, list):
+            return []
+        return [nested for block in content for nested in _nested_blocks(block) if nested.get("type") == "image"]
+
+    def apply(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        image_indexes = [i for i, message in enumerate(messages) if self._images(message)]
+        dropped = len(image_indexes) - self.keep_images
+        if dropped <= 0:
+            return messages
+
+        for position in range(len(image_indexes) - 1, -1, -1):
+            if any(block.get("source", {}).get("kind", "full") == "full"
+                   for block in self._images(messages[image_indexes[position]])):
+                dropped = min(dropped, position)
+                break
+        # Both bounds only grow, so the rounded boundary never moves backwards
+        dropped -= dropped % self.step
+        if dropped <= 0:
+            return messages
+        keep_from = image_indexes[dropped]
+
+        image_set = set(image_indexes)
+        result = []
+        for i, message in enumerate(messages):
+            if i >= keep_from or i not in image_set:
+                result.append(message)
+                continue
+            result.append(dict(message, content=_replace_images(message["content"])))
+        return result
+
+
+class TokenBudgetPolicy(HistoryPolicy):
+    """Fit the request into an input-token budget.
+
+    First compacts long text blocks outside the most recent messages, then
+    drops the oldest assistant/user turn pairs after the opening task
+    message until the estimate fits.
+    """
+    def __init__(self, max_input_tokens: int, keep_recent: int = 4, compact_chars: int = 600):
+        self.max_input_tokens = int(max_input_tokens)
+        self.keep_recent = max(1, int(keep_recent))
+        self.compact_chars = int(compact_chars)
+
+    def apply(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.max_input_tokens <= 0 or estimate_message_tokens(messages) <= self.max_input_tokens:
+            return messages
+
+        # 1. Compact long text in older turns (the opening task message is kept whole)
+        protected = max(1, len(messages) - self.keep_recent)
+        compacted = [messages[0]] if messages else []
+        for message in messages[1:protected]:
+            compacted.append(self._compact(message))
+        compacted.extend(messages[protected:])
+        if estimate_message_tokens(compacted) <= self.max_input_tokens:
+            return compacted
+
+        # 2. Drop the oldest turn pairs, keeping roles alternating
+        while (len(compacted) - 1 > self.keep_recent
+               and estimate_message_tokens(compacted) > self.max_input_tokens):
+            del compacted[1:3]
+        return compacted
+
+    def _compact(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        content = message.get("content")
+        if not isinstance(content, list):
+            return message
+        blocks = []
+        for block in content:
+            if (isinstance(block, dict) and block.get("type") == "text"
+                    and len(block.get("text", "")) > self.compact_chars):
+                block = dict(block, text=block["text"][:self.compact_chars] + " ...[truncated]")
+            blocks.append(block)
+        return dict(message, content=blocks)
+
+
+class HistoryManager:
+    """Applies a chain of history policies when a request is built"""
+    def __init__(self, policies: Optional[List[HistoryPolicy]] = None):
+        self.policies: List[HistoryPolicy] = list(policies or [])
+
+    @classmethod
+    def from_config(cls, config) -> "HistoryManager":
+        policies: List[HistoryPolicy] = []
+        keep_images = int(config.get_setting('history_keep_images', 3))
+        if keep_images > 0:
+            policies.append(ImageWindowPolicy(keep_images, config.get_setting('history_image_step', 3)))
+        max_tokens = int(config.get_setting('history_max_input_tokens', 0) or 0)
+        if max_tokens > 0:
+            policies.append(TokenBudgetPolicy(
+                max_tokens,
+                keep_recent=config.get_setting('history_keep_recent_messages', 4),
+                compact_chars=config.get_setting('history_compact_text_chars', 600)
+            ))
+        return cls(policies)
+
+    def build(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the message list to send; the stored history is not modified"""
+        for policy in self.policies:
+            messages = policy.apply(messages)
+        return messages
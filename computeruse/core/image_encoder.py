@@ -0,0 +1,99 @@
+from PIL import Image
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+import time
+
+# computeruse/core/image_encoder.py
+class JpegEncoder:
+    """JPEG encoder with a fixed-quality mode and a per-frame byte budget mode"""
+    def __init__(self, config, logger):
+        self.config = config
+        self.logger = logger
+
+        # Quality that fit the budget last time; seeds the next search
+        self.last_quality: Optional[int] = None
+
+    def _save(self, image: Image.Image, quality: int) -> bytes:
+        buffered = BytesIO()
+        image.save(
+            buffered,
+            format="JPEG",
+            quality=quality,
+            optimize=bool(self.config.get_setting('jpeg_optimize', False))
+        )
+        return buffered.getvalue()
+
+    def encode(self, image: Image.Image, quality: Optional[int] = None) -> Tuple[bytes, Dict]:
+        """Encode an image and report the chosen quality and encode time.
+
+        With 'jpeg_byte_budget' set, searches for the highest quality whose
+        output fits the budget, starting from the previous frame's quality.
+        An explicit quality skips the search.
+        """
+        start = time.perf_counter()
+        budget = int(self.config.get_setting('jpeg_byte_budget', 0) or 0)
+
+        if quality is not None or budget <= 0:
+            quality = int(quality if quality is not None else self.config.get_setting('screenshot_quality', 60))
+            data = self._save(image, quality)
+            attempts = 1
+        else:
+            quality, data, attempts = self._search(image, budget)
+            self.last_quality = quality
+
+        info = {
+            "quality": quality,
+            "bytes": len(data),
+            "budget": budget,
+            "within_budget": budget <= 0 or len(data) <= budget,
+            "attempts": attempts,
+            "encode_ms": (time.perf_counter() - start) * 1000
+        }
+        return data, info
+
+    def _search(self, image: Image.Image, budget: int) -> Tuple[int, bytes, int]:
+        """Gallop from the seed quality to bracket the budget, then bisect"""
+        min_q = int(self.config.get_setting('jpeg_min_quality', 30))
+        max_q = int(self.config.get_setting('jpeg_max_quality', 90))
+        max_attempts = max(1, int(self.config.get_setting('jpeg_max_attempts', 5)))
+        seed = self.last_quality or int(self.config.get_setting('screenshot_quality', 60))
+        seed = max(min_q, min(seed, max_q))
+
+        # Invariants: fit_q fits the budget, fail_q does not
+        fit_q, fit_data = None, None
+        fail_q, fail_data = max_q + 1, None
+        attempts = 0
+
+        def probe(quality: int) -> bool:
+            nonlocal fit_q, fit_data, fail_q, fail_data, attempts
+            data = self._save(image, quality)
+            attempts += 1
+            if len(data) <= budget:
+                fit_q, fit_data = quality, data
+                return True
+            fail_q, fail_data = quality, data
+            return False
+
+        # Gallop away from the seed until the budget boundary is bracketed
+        step = 5
+        if probe(seed):
+            while attempts < max_attempts and fit_q < max_q:
+                if not probe(min(fit_q + step, max_q)):
+                    break
+                step *= 2
+        else:
+            while attempts < max_attempts and fail_q > min_q:
+                if probe(max(fail_q - step, min_q)):
+                    break
+                step *= 2
+
+        # Bisect between the highest fit and the lowest failure
+        while attempts < max_attempts and fit_q is not None and fail_q - fit_q > 1:
+            probe((fit_q + fail_q) // 2)
+
+        if fit_q is None:
+            # Nothing fit; fall back to the lowest allowed quality
+            if fail_q == min_q:
+                return min_q, fail_data, attempts
+            return min_q, self._save(image, min_q), attempts + 1
+        return fit_q, fit_data, attempts
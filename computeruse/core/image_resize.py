@@ -0,0 +1,54 @@
+from PIL import Image
+from typing import Optional, Tuple
+
+# computeruse/core/image_resize.py
+RESIZE_MODES = ('auto', 'reduce', 'box', 'lanczos')
+
+
+def integer_reduce_factor(scale: float) -> Optional[int]:
+    """Return n when scale is exactly 1/n for an integer n >= 2, else None"""
+    if scale <= 0:
+        return None
+    factor = 1.0 / scale
+    nearest = round(factor)
+    if nearest >= 2 and abs(factor - nearest) < 1e-6:
+        return int(nearest)
+    return None
+
+
+def choose_resize_mode(scale: float, mode: str = 'auto') -> str:
+    """Resolve 'auto' to the cheapest mode suitable for the scale factor"""
+    if mode not in RESIZE_MODES:
+        raise ValueError(f"Unknown resize mode: {mode}")
+    if mode != 'auto':
+        return mode
+    return 'reduce' if integer_reduce_factor(scale) else 'box'
+
+
+def resize_frame(image: Image.Image, size: Tuple[int, int], scale: float,
+                 mode: str = 'auto') -> Tuple[Image.Image, str]:
+    """Downscale a native capture to size and report the mode actually used.
+
+    'reduce' averages whole n x n blocks (Image.reduce) and is only valid
+    for integer factors; 'box' is a single-pass area filter for any factor;
+    'lanczos' is the slow high-quality filter kept as a selectable option.
+    """
+    mode = choose_resize_mode(scale, mode)
+    if image.size == tuple(size):
+        return image, 'none'
+
+    if mode == 'reduce':
+        factor = integer_reduce_factor(scale)
+        if factor:
+            reduced = image.reduce(factor)
+            width, height = size
+            # reduce() rounds up; trim the odd pixel so coordinates match int(native * scale)
+            if reduced.size != (width, height) and reduced.width >= width and reduced.height >= height:
+                reduced = reduced.crop((0, 0, width, height))
+            if reduced.size == (width, height):
+                return reduced, 'reduce'
+        mode = 'box'
+
+    if mode == 'box':
+        return image.resize(size, Image.Resampling.BOX), 'box'
+    return image.resize(size, Image.Resampling.LANCZOS), 'lanczos'
@@ -0,0 +1,50 @@
+import math
+from typing import Tuple
+
+# computeruse/core/image_tokens.py
+# Vision limits from the Anthropic docs: images whose long edge exceeds
+# 1568px or that cost more than ~1600 tokens are resized server-side, and
+# an image costs about (width * height) / 750 tokens.
+MAX_IMAGE_EDGE = 1568
+MAX_IMAGE_TOKENS = 1600
+PIXELS_PER_TOKEN = 750
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """Estimate the input tokens billed for an image of the given size"""
+    width, height = fit_to_api_limits(width, height)
+    return max(1, math.ceil(width * height / PIXELS_PER_TOKEN))
+
+
+def fits_api_limits(width: int, height: int) -> bool:
+    """True if the server will not need to resize an image of this size"""
+    return (max(width, height) <= MAX_IMAGE_EDGE
+            and width * height / PIXELS_PER_TOKEN <= MAX_IMAGE_TOKENS)
+
+
+def fit_to_api_limits(width: int, height: int) -> Tuple[int, int]:
+    """Return the size the server would downscale an image to"""
+    scale = min(1.0, MAX_IMAGE_EDGE / max(width, height, 1))
+    scale = min(scale, math.sqrt(MAX_IMAGE_TOKENS * PIXELS_PER_TOKEN / max(width * height, 1)))
+    if scale >= 1.0:
+        return width, height
+    return int(width * scale), int(height * scale)
+
+
+def choose_downscale_factor(native_width: int, native_height: int, token_budget: int,
+                            step: float = 0.1, min_factor: float = 0.1,
+                            max_factor: float = 1.0) -> float:
+    """Pick the largest downscale factor whose frame fits the token budget.
+
+    Factors are searched on the same 0.1 grid as the downscale slider, and
+    a factor only qualifies if the server would not resize the frame again.
+    """
+    budget = min(int(token_budget), MAX_IMAGE_TOKENS)
+    steps = int(round((max_factor - min_factor) / step))
+    for i in range(steps + 1):
+        factor = round(max_factor - i * step, 2)
+        width = int(native_width * factor)
+        height = int(native_height * factor)
+        if fits_api_limits(width, height) and math.ceil(width * height / PIXELS_PER_TOKEN) <= budget:
+            return factor
+    return min_factor
@@ -1,20 +1,30 @@
 # computeruse/core/interface.py
-import time
 import json
 import platform as pf
-from anthropic import Anthropic
 import pyautogui
-from typing import Optional, Dict, List, Any
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Any, Callable, Iterator, Tuple
 from .screenshot_manager import ScreenshotManager
 from .action_handler import ActionHandler
+from .action_optimizer import ActionOptimizer
+from .image_tokens import choose_downscale_factor, estimate_image_tokens
+from .agent_loop import LineBuffer, StepHook, StepState
+from .action_parser import COMPLETED, Action, ParseError, parse_action_line, parse_actions
+from .tool_use import ToolCall, assistant_content, parse_tool_calls, tool_result_content
+from .history_manager import HistoryManager, estimate_message_tokens
+from .request_scheduler import RequestScheduler
+from .client_factory import check_api_key_format, create_client, prewarm
+from .response_cache import ResponseCache
 
 class Interface:
     def __init__(self, config, logger):
         self.config = config
         self.logger = logger
-        self.action_handler = ActionHandler(config, logger)
         self.screenshot_manager = ScreenshotManager(config, logger)
+        self.action_handler = ActionHandler(config, logger, self.screenshot_manager)
+        self.action_optimizer = ActionOptimizer(config, logger, self.action_handler.timer)
         self.client = None
+        self.api_key_validated = False
         
         # Control flags
         self.is_processing = False
@@ -26,6 +36,11 @@ class Interface:
         self.current_iteration = 0
         self.max_iterations = config.get_setting('max_iterations', 20)
         self.conversation_history = []
+        self.history_manager = HistoryManager.from_config(config)
+        self.request_scheduler = RequestScheduler(config, logger, should_stop=lambda: self.should_stop)
+        self.response_cache = ResponseCache(config, logger)
+        # Smoothed request latency, used to time the speculative capture
+        self._api_seconds: Optional[float] = None
         
         # Action timing
         self.default_wait_time = config.get_setting('wait_time', 3.0)
@@ -38,14 +53,15 @@ class Interface:
         self.current_scale_y = 1.0
         
         self.action_sequence = []
+        self._system_prompts: Dict[str, str] = {}
+        
+        # Callbacks fired at each agent loop phase (timing, tracing)
+        self.step_hooks: List[StepHook] = []
 
         # Initialize with default scale
         self.update_scaling_factors()
 
-    def create_system_prompt(self) -> str: # FOR FUTURE USE
-        """
-        Create a system prompt to structure Claude's responses
-        """
+    def _platform_name(self) -> str:
         os_name = pf.system()
         if os_name == "Windows":
             os_version = pf.win32_ver()[0]
@@ -56,6 +72,19 @@ class Interface:
         else:
             os_version = pf.freedesktop_os_release()["VERSION_ID"]
             platform_name = f"{os_name} {os_version}"
+        return platform_name
+
+    def uses_tool_calls(self) -> bool:
+        """True when actions come from computer tool_use blocks instead of the text format"""
+        return self.config.get_setting('action_format', 'tool_use') == 'tool_use'
+
+    def create_system_prompt(self) -> str:
+        """
+        Create a system prompt to structure Claude's responses
+        """
+        platform_name = self._platform_name()
+        if self.uses_tool_calls():
+            return self.create_tool_system_prompt(platform_name)
         
         return f"""With the provided current latest screenshot on the {platform_name} platform, please provide responses in the following format only.
 Requirement:
@@ -113,6 +142,15 @@ Output example (ex,, when latest screenshot is observed to indicate the completi
 [completed]
    """
 
+    def create_tool_system_prompt(self, platform_name: str) -> str:
+        """Short system prompt for driving the computer tool directly"""
+        return f"""You are operating a {platform_name} computer through the computer tool.
+- Each message shows the latest screenshot at the working resolution given with it; use coordinates in that resolution and be exact.
+- Beware of the operating system differences and whether the Dark Mode is applied.
+- To click on a target, move the mouse to it first. After opening an application or page, take a screenshot to check the result instead of assuming it.
+- Keep explanations to one short sentence per step.
+- When the latest screenshot shows the task is completed, reply with a one-line summary and no tool call."""
+
     def get_wait_time(self) -> float:
         """Get the current wait time between actions"""
         return self.config.get_setting('wait_time', self.default_wait_time)
@@ -120,14 +158,25 @@ Output example (ex,, when latest screenshot is observed to indicate the completi
     def initialize_interface(self) -> None:
         """Initialize interface settings"""
         pyautogui.FAILSAFE = False
-        pyautogui.PAUSE = 0.5
+        # ActionTimer owns every inter-action delay; pyautogui must not add its own
+        pyautogui.PAUSE = 0
         self.reset_state()
     
     def initialize_anthropic(self, api_key: str) -> bool:
-        """Initialize the Anthropic client with the provided API key"""
+        """Initialize the Anthropic client with the provided API key.
+
+        Only the key format is checked here; the key itself is validated by
+        the first real request unless 'validate_key_on_init' is set.
+        """
         try:
-            self.client = Anthropic(api_key=api_key)
-            self.test_connection()
+            check_api_key_format(api_key)
+            self.client = create_client(self.config, api_key)
+            self.api_key_validated = False
+            if self.config.get_setting('validate_key_on_init', False):
+                self.test_connection()
+                self.api_key_validated = True
+            elif self.config.get_setting('prewarm_connection', True):
+                prewarm(self.config, self.client, self.logger)
             self.logger.add_entry("System", "Anthropic client initialized successfully")
             return True
         except Exception as e:
@@ -165,9 +214,7 @@ Output example (ex,, when latest screenshot is observed to indicate the completi
             if screenshot_result.get("type") == "error":
                 raise Exception(f"Failed to take screenshot: {screenshot_result.get('error')}")
                 
-            current_screenshot = self.screenshot_manager.get_current_screenshot()
-            if not current_screenshot:
-                raise Exception("No screenshot available")
+            image_content = self.screenshot_manager.build_image_content()
             # Get current scale factor and dimensions
             downscale = float(self.config.get_setting('downscale_factor'))
             target_width = int(self.native_width * downscale)
@@ -189,16 +236,8 @@ Output example (ex,, when latest screenshot is observed to indicate the completi
                     {
                         "type": "text",
                         "text": f"{text}"
-                    },
-                    {
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "image/jpeg",
-                            "data": current_screenshot["image_data"]
-                        }
                     }
-                ]
+                ] + image_content
             }
         except Exception as e:
             self.logger.add_entry("Error", f"Error creating message with screenshot: {str(e)}")
@@ -226,20 +265,8 @@ Output example (ex,, when latest screenshot is observed to indicate the completi
             f"by {scale:.1f})"
         )
         
-        response = self.client.beta.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=2048,
-            temperature=0,
-            messages=messages,
-            tools=[{
-                "type": "computer_20241022",
-                "name": "computer",
-                "display_width_px": target_width,
-                "display_height_px": target_height,
-                "display_number": 1
-            }],
-            betas=["computer-use-2024-10-22"]
-        )
+        with self._prefetching():
+            response = self._create_message(messages, max_tokens=2048)
         
         self.logger.add_entry("Debug", "Received response from Claude")
         return response
@@ -252,6 +279,9 @@ Output example (ex,, when latest screenshot is observed to indicate the completi
         self.should_stop = False
         self.task_complete = False
         self.current_iteration = 0
+        self.history_manager = HistoryManager.from_config(self.config)
+        self.screenshot_manager.reset_sent_state()
+        self.action_handler.timer.reset_stats()
     
     def stop_processing(self) -> None:
         """Stop current processing"""
@@ -300,183 +330,641 @@ Output example (ex,, when latest screenshot is observed to indicate the completi
             f"Scale: {downscale_factor}"
         )
 
-    def process_response(self, response):
-        try:
-            if self.should_stop:
-                self.logger.add_entry("System", "Task stopped by user")
-                return
-                
-            if self.current_iteration >= self.max_iterations:
-                self.logger.add_entry("System", f"Maximum iterations ({self.max_iterations}) reached.")
-                self.task_complete = True
-                return
+    def auto_tune_resolution(self) -> Optional[float]:
+        """Pick the downscale factor from the per-frame image token budget.
 
-            self.current_iteration += 1
-            self.logger.add_entry("Debug", f"Iteration {self.current_iteration}/{self.max_iterations}")
-            
-            task_progress = []
-            pending_actions = []
-
-            # First pass: Analyze text responses and build action context
-            for content in response.content:
-                if hasattr(content, 'text'):
-                    text = content.text.lower()
-                    
-                    # Update conversation history (do this only once)
-                    self.conversation_history.append({
-                        "role": "assistant",
-                        "content": [{"type": "text", "text": content.text}]
-                    })
-                    self.logger.add_entry("Claude", content.text)
-
-                    #print(text)
-
-                    if '[completed]' in text:
-                        self.logger.add_entry("System", f"Claude terminated conversation due to task completion.")
-                        self.task_complete = True
-                        break
-                    
-                    # Identifying the Tasks in order
-                    line_number = 1
-                    for line in text.split('\n'):
-                        if str(line_number) + '.' in line:
-                            line = line.replace(str(line_number) + '.', '').strip()
-                        else:
-                            continue; # Wrong Format (Does not start with Number. ~)
-                        
-                        if '[screenshot]' in line:
-                            pending_actions.append(('screenshot', {}))
-                        elif '[move]' in line:
-                            coordinates = line.replace('[move]', '').strip().replace('<', '').replace('>', '')
-                            x, y = map(float, coordinates.split(','))
-                            pending_actions.append(('mouse_move', {'coordinate': [x, y]}))
-                        elif '[click]' in line:
-                            pending_actions.append(('left_click', {}))
-                        elif '[double_click]' in line:
-                            pending_actions.append(('double_click', {}))
-                        elif '[right_click]' in line:
-                            pending_actions.append(('right_click', {}))
-                        elif '[mouse_scroll]' in line:
-                            scroll_amount = line.replace('[mouse_scroll]', '').strip().replace('<', '').replace('>', '')
-                            pending_actions.append(('mouse_scroll', {'amount': scroll_amount}))
-                        elif '[type]' in line:
-                            text_to_type = line.replace('[type]', '').strip().replace('"', '')
-                            pending_actions.append(('type', {'text': text_to_type}))
-                        elif '[key_press]' in line:
-                            key_to_press = line.replace('[key_press]', '').strip().replace('<', '').replace('>', '')
-                            pending_actions.append(('key_press', {'text': key_to_press}))
-                        elif '[drag]' in line:
-                            drag_coordinates = line.replace('[drag]', '').strip().replace('<', '').replace('>', '')
-                            x, y = map(float, drag_coordinates.split(','))
-                            pending_actions.append(('drag', {'coordinate': [x, y]}))
-                        elif '[wait]' in line:
-                            wait_time = line.replace('[wait]', '').strip().replace('<', '').replace('>', '')
-                            pending_actions.append(('wait', {'duration': wait_time}))
-                        line_number += 1
-                    
-                    
-                    # Process the tasks
-                    result = None
-                    if pending_actions:
-                        wait_time = self.get_wait_time()
-                        combined_results = []
-
-                        for pending_action, pending_input in pending_actions:
-                            if self.should_stop:
-                                break
-                            next_result = self.execute_tool_action(pending_action, pending_input)
-                            if next_result and next_result.get("type") != "error":
-                                combined_results.append(next_result)
-                        
-                        result = {
-                            "type": "combined_action",
-                            "actions": combined_results
-                        }
-                        pending_actions.clear()
-                    
-                    # Take a new screenshot after actions if there were no screenshots taken
-                    if pending_actions and pending_actions[-1][0] != 'screenshot':
-                        time.sleep(self.get_wait_time())
-                        self.execute_tool_action('screenshot', {})
-
-                    if not self.should_stop:
-                        # Prepare next message with current state
-                        next_message = {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": (
-                                        f"Your current task is: {self.current_task}\n"
-                                        f"Your previous response is: {text}"
-                                        f"Your previous action result is: {json.dumps(result)}. "
-                                        "Please verify if the task is completed. If not, continue with the necessary actions. The screenshot is the latest environment."
-                                    )
-                                },
-                                {
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": "image/jpeg",
-                                        "data": self.screenshot_manager.get_current_screenshot()["image_data"]
-                                    }
-                                }
-                            ]
-                        }
-                        # Continue conversation
-                        try:
-                            new_response = self.client.beta.messages.create(
-                                model="claude-3-5-sonnet-20241022",
-                                max_tokens=512,
-                                temperature=0,
-                                messages=self.conversation_history + [next_message],
-                                tools=[{
-                                    "type": "computer_20241022",
-                                    "name": "computer",
-                                    "display_width_px": self.target_width,
-                                    "display_height_px": self.target_height,
-                                    "display_number": 1
-                                }],
-                                betas=["computer-use-2024-10-22"]
-                            )
-                            self.process_response(new_response) #LOOP
-                            
-                        except Exception as api_error:
-                            if "safety reasons" in str(api_error):
-                                if not self.should_stop:
-                                    self.logger.add_entry("System", "Retrying without screenshot...")
-                                    # Remove screenshot content
-                                    filtered_messages = [
-                                        {
-                                            "role": msg["role"],
-                                            "content": [
-                                                c for c in msg["content"]
-                                                if c["type"] == "text"
-                                            ]
-                                        }
-                                        for msg in self.conversation_history + [next_message]
-                                    ]
-                                    retry_response = self.client.beta.messages.create(
-                                        model="claude-3-5-sonnet-20241022",
-                                        max_tokens=1024,
-                                        temperature=0,
-                                        messages=filtered_messages,
-                                        tools=[{
-                                            "type": "computer_20241022",
-                                            "name": "computer",
-                                            "display_width_px": self.target_width,
-                                            "display_height_px": self.target_height,
-                                            "display_number": 1
-                                        }],
-                                        betas=["computer-use-2024-10-22"]
-                                    )
-                                    self.process_response(retry_response)
-                            else:
-                                raise api_error
+        Returns the chosen factor, or None when 'auto_downscale' is off.
+        The factor goes into the config, so ActionHandler's coordinate
+        scaling follows it automatically.
+        """
+        if not self.config.get_setting('auto_downscale', False):
+            return None
+        
+        budget = int(self.config.get_setting('image_token_budget', 1600))
+        factor = choose_downscale_factor(self.native_width, self.native_height, budget)
+        self.update_resolution(factor)
+        self.update_target_resolution(factor)
+        self.action_handler.update_resolution_settings()
+        
+        self.logger.add_entry("System",
+            f"Auto-selected downscale {factor:.1f} for a {budget}-token image budget "
+            f"(~{estimate_image_tokens(self.target_width, self.target_height)} tokens per frame)"
+        )
+        return factor
+
+    def add_step_hook(self, hook: StepHook) -> None:
+        """Register a callback fired as hook(phase, step) for each loop phase"""
+        self.step_hooks.append(hook)
+
+    def _run_hooks(self, phase: str, step: StepState) -> None:
+        for hook in self.step_hooks:
+            try:
+                hook(phase, step)
+            except Exception as e:
+                self.logger.add_entry("Error", f"Step hook failed in {phase}: {str(e)}")
+
+    def process_response(self, response) -> None:
+        """Drive the agent loop from an initial response until the task ends.
+
+        Each iteration gets its own StepState which is released once the
+        next request has been sent, so long tasks use constant stack and
+        only the conversation history grows between steps.
+        """
+        next_step = self._next_step(response)
+        try:
+            while next_step is not None and self._begin_iteration(next_step):
+                step, next_step = next_step, None
+                next_step = self._run_step(step)
+                self._end_iteration(step)
+                del step
 
         except Exception as e:
             self.logger.add_entry("Error", f"Error processing response: {str(e)}")
             self.task_complete = True
+        finally:
+            self._log_request_metrics()
+
+    def _begin_iteration(self, step: StepState) -> bool:
+        """Number the step, or return False when the task was stopped or ran out of iterations"""
+        if self.should_stop:
+            self.logger.add_entry("System", "Task stopped by user")
+            return False
+            
+        if self.current_iteration >= self.max_iterations:
+            self.logger.add_entry("System", f"Maximum iterations ({self.max_iterations}) reached.")
+            self.task_complete = True
+            return False
+
+        self.current_iteration += 1
+        self.logger.add_entry("Debug", f"Iteration {self.current_iteration}/{self.max_iterations}")
+        step.iteration = self.current_iteration
+        return True
+
+    def _end_iteration(self, step: StepState) -> None:
+        self._run_hooks('step_end', step)
+        self.logger.add_entry("Debug", f"Iteration {step.iteration} timings: {step.timing_summary()}")
+
+    @staticmethod
+    def _next_step(response: Any) -> Optional[StepState]:
+        return StepState(iteration=0, response=response) if response is not None else None
+
+    def _log_request_metrics(self) -> None:
+        metrics = self.request_scheduler.metrics()
+        self.logger.add_entry("Debug",
+            f"Requests: {metrics['requests']}, retries {metrics['retries']} "
+            f"({metrics['retry_wait_s']:.1f}s), throttled {metrics['throttle_events']} times "
+            f"({metrics['throttled_s']:.1f}s), failed {metrics['failures']}"
+        )
+        timing = self.action_handler.timer.stats()
+        if timing["actions"]:
+            self.logger.add_entry("Debug",
+                f"Action timing ({timing['profile']}): {timing['actions']} actions, "
+                f"{timing['delay_s']:.1f}s in inter-action delays, {timing['move_s']:.1f}s in mouse moves"
+            )
+        prefetch = self.screenshot_manager.prefetch_stats
+        if prefetch["started"]:
+            self.logger.add_entry("Debug",
+                f"Prefetch: {prefetch['hits']} reused, {prefetch['misses']} stale, "
+                f"{prefetch['aborted']} not started of {prefetch['started']}"
+            )
+        if self.response_cache.enabled:
+            cache = self.response_cache.stats()
+            self.logger.add_entry("Debug",
+                f"Response cache: {cache['hits']} hits, {cache['misses']} misses "
+                f"({cache['hit_rate']:.0%} hit rate), {cache['evictions']} evicted"
+            )
+
+    def _run_step(self, step: StepState) -> Optional[StepState]:
+        """Run one iteration and return the next step, or None when done.
+
+        The decisions live in the helpers below so the async loop can reuse
+        them; this method only performs the actions, capture and request.
+        """
+        plan = self._prepare_step(step)
+        if plan is None:
+            return None
+        execute, needs_screenshot = plan
+        
+        with step.timed('actions'):
+            if execute is not None:
+                execute(step)
+        self._run_hooks('actions_done', step)
+        
+        capture = self._capture_mode(step, needs_screenshot)
+        if capture is not None:
+            with step.timed('capture'):
+                if capture == 'settled':
+                    # Encoding overlaps the settle wait instead of following it
+                    self._log_capture(self.screenshot_manager.take_settled_screenshot(
+                        self.get_wait_time(),
+                        should_stop=lambda: self.should_stop
+                    ))
+                else:
+                    self.screenshot_manager.take_screenshot()
+        self._run_hooks('captured', step)
+
+        if self.should_stop:
+            return None
+        
+        self._append_next_message(step)
+        
+        # Continue conversation
+        with step.timed('api'):
+            if self._streaming():
+                return self._stream_next_step()
+            with self._prefetching():
+                response = self._request_next_response()
+        self._record_api_time(step.timings['api'])
+        return self._next_step(response)
+
+    def _prepare_step(self, step: StepState) -> Optional[Tuple[Optional[Callable[[StepState], None]], bool]]:
+        """Parse a step and decide what it runs.
+
+        Returns None when the loop ends here, otherwise the executor for the
+        step's actions (None when they already ran or there are none) and
+        whether a screenshot must follow them.
+        """
+        self._run_hooks('step_start', step)
+        
+        with step.timed('parse'):
+            self._parse_step(step)
+        step.response = None
+        self._run_hooks('parsed', step)
+        
+        if step.completed:
+            self.logger.add_entry("System", f"Claude terminated conversation due to task completion.")
+            self.task_complete = True
+            return None
+        if not step.text and not step.tool_calls:
+            # Nothing to act on (e.g. a reply without text blocks)
+            return None
+        
+        # Take a new screenshot after actions if there were no screenshots taken
+        needs_screenshot = bool(step.actions) and step.actions[-1].kind != 'screenshot'
+        execute = None
+        if step.tool_calls and not step.executed:
+            execute = self._execute_tool_calls
+        elif step.actions and not step.executed:
+            execute = self._execute_step_actions
+        return execute, needs_screenshot
+
+    def _capture_mode(self, step: StepState, needs_screenshot: bool) -> Optional[str]:
+        """'settled' after actions, 'refresh' to reuse a prefetched frame, or None"""
+        if needs_screenshot and not self.should_stop:
+            return 'settled'
+        if not step.actions and self.screenshot_manager.has_prefetch():
+            # Nothing ran since the request; pick up changes seen during inference
+            return 'refresh'
+        return None
+
+    def _log_capture(self, screenshot_result: Dict) -> None:
+        self.logger.add_entry("Debug", f"Post-action capture: {json.dumps(screenshot_result)}")
+
+    def _streaming(self) -> bool:
+        return bool(self.config.get_setting('streaming', False))
+
+    @contextmanager
+    def _prefetching(self) -> Iterator[None]:
+        """Prefetch a frame while the request inside the block is in flight"""
+        self._start_prefetch()
+        try:
+            yield
+        finally:
+            self.screenshot_manager.stop_prefetch_wait()
+
+    def _start_prefetch(self) -> None:
+        """Capture a candidate frame late in the expected inference time"""
+        if self._api_seconds is None:
+            delay = float(self.config.get_setting('prefetch_delay', 1.0))
+        else:
+            delay = self._api_seconds * float(self.config.get_setting('prefetch_fraction', 0.7))
+        self.screenshot_manager.start_prefetch(delay)
+
+    def _record_api_time(self, seconds: float) -> None:
+        if self._api_seconds is None:
+            self._api_seconds = seconds
+        else:
+            self._api_seconds = 0.7 * self._api_seconds + 0.3 * seconds
+
+    def _execute_step_actions(self, step: StepState) -> None:
+        """Run the parsed actions of a step in order and record the combined result"""
+        combined_results = []
+        step.actions = self._optimize_actions(step.actions)
+        for action in step.actions:
+            if self.should_stop:
+                break
+            next_result = self.execute_tool_action(action.kind, action.tool_input())
+            if next_result and next_result.get("type") != "error":
+                combined_results.append(next_result)
+        
+        step.result = self._combined_result(step, combined_results)
+
+    def _execute_tool_calls(self, step: StepState) -> None:
+        """Run the actions of each tool call in order; results go into the tool_result blocks"""
+        for call in step.tool_calls:
+            if self.should_stop:
+                break
+            self._execute_tool_call(call)
+
+    def _execute_tool_call(self, call: ToolCall) -> None:
+        if call.error:
+            self.logger.add_entry("Error", f"Skipping tool call {call.id}: {call.error}")
+            return
+        call.results = []
+        call.actions = self._optimize_actions(call.actions)
+        for action in call.actions:
+            if self.should_stop:
+                break
+            call.results.append(self.execute_tool_action(action.kind, action.tool_input()))
+
+    def _optimize_actions(self, actions: List[Action]) -> List[Action]:
+        """Coalesce and prune a plan before it runs, starting from the real cursor position"""
+        if not self.action_optimizer.enabled or not actions:
+            return actions
+        scale = float(self.config.get_setting('downscale_factor'))
+        x, y = pyautogui.position()
+        return self.action_optimizer.optimize(actions, (x * scale, y * scale), self.action_handler.is_dragging)
+
+    @staticmethod
+    def _combined_result(step: StepState, combined_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        result = {
+            "type": "combined_action",
+            "actions": combined_results
+        }
+        if step.parse_errors:
+            # Tell Claude which lines were skipped so it can restate them
+            result["parse_errors"] = [error.as_dict() for error in step.parse_errors]
+        return result
+
+    def _append_next_message(self, step: StepState) -> None:
+        """Prepare next message with current state and add it to the history"""
+        if step.tool_calls:
+            step.next_message = {
+                "role": "user",
+                "content": tool_result_content(step.tool_calls, self.screenshot_manager.build_image_content())
+            }
+            self.conversation_history.append(step.next_message)
+            return
+        step.next_message = {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": (
+                        f"Your current task is: {self.current_task}\n"
+                        f"Your previous response is: {step.text}"
+                        f"Your previous action result is: {json.dumps(step.result)}. "
+                        "Please verify if the task is completed. If not, continue with the necessary actions. The screenshot is the latest environment."
+                    )
+                }
+            ] + self.screenshot_manager.build_image_content()
+        }
+        self.conversation_history.append(step.next_message)
+
+    def _parse_step(self, step: StepState) -> None:
+        """Record Claude's reply in the history and extract its actions"""
+        if self.uses_tool_calls():
+            self._parse_tool_step(step)
+            return
+        texts = [content.text for content in step.response.content if hasattr(content, 'text')]
+        if not texts:
+            return
+        reply = "\n".join(texts)
+        
+        # Update conversation history (do this only once)
+        self.conversation_history.append({
+            "role": "assistant",
+            "content": [{"type": "text", "text": reply}]
+        })
+        self.logger.add_entry("Claude", reply)
+        
+        step.text = reply
+        if step.executed:
+            step.completed = step.completed or bool(COMPLETED.search(reply))
+            return
+        parsed = parse_actions(reply)
+        step.completed = parsed.completed
+        step.actions = parsed.actions
+        step.parse_errors = parsed.errors
+        for error in parsed.errors:
+            self._log_parse_error(error)
+
+    def _parse_tool_step(self, step: StepState) -> None:
+        """Record a tool-driven reply; a reply without tool calls ends the task"""
+        content = step.response.content
+        calls = parse_tool_calls(content)
+        if step.executed:
+            # Streamed calls already ran; keep their results
+            ran = {call.id: call for call in step.tool_calls}
+            calls = [ran.get(call.id, call) for call in calls]
+        
+        self.conversation_history.append({"role": "assistant", "content": assistant_content(content)})
+        step.text = "\n".join(block.text for block in content if getattr(block, 'type', None) == 'text')
+        if step.text:
+            self.logger.add_entry("Claude", step.text)
+        for call in calls:
+            self.logger.add_entry("Tool", f"{call.name}: {json.dumps(call.input)}")
+        
+        step.tool_calls = calls
+        step.actions = [action for call in calls for action in call.actions]
+        step.completed = not calls
+
+    def _log_parse_error(self, error: ParseError) -> None:
+        self.logger.add_entry("Error", f"Skipping action line {error.line_number} '{error.line}': {error.message}")
+
+    def _stream_next_step(self) -> Optional[StepState]:
+        """Stream the next response and run each action as soon as its line completes.
+
+        Mouse and keyboard actions overlap with the rest of the generation;
+        the returned step is marked as executed so the loop does not run
+        its actions again.
+        """
+        step = StepState(iteration=0, executed=True)
+        combined_results = []
+        
+        try:
+            request = self._build_request(self.conversation_history, max_tokens=512)
+            cache_key, cached = self._cached_response(request)
+            if cached is not None:
+                # Replayed replies run through the regular parse/execute path
+                return self._next_step(cached)
+            consume = self._consume_tool_stream if self.uses_tool_calls() else self._consume_stream
+            # Only retry while no streamed action has run yet
+            self.request_scheduler.call(
+                lambda: consume(step, request, combined_results),
+                estimated_tokens=self._estimate_request_tokens(self.conversation_history),
+                can_retry=lambda: not step.actions
+            )
+        except Exception as api_error:
+            if not self._is_safety_refusal(api_error) or step.actions:
+                raise
+            return self._next_step(self._request_next_response())
+        
+        self._finish_streamed_step(step, combined_results)
+        if cache_key:
+            self.response_cache.put(cache_key, step.response)
+        return step
+
+    @staticmethod
+    def _is_safety_refusal(error: Exception) -> bool:
+        return "safety reasons" in str(error)
+
+    def _consume_stream(self, step: StepState, request: Dict[str, Any],
+                        combined_results: List[Dict[str, Any]]) -> Any:
+        """Open one stream and handle its lines as they complete"""
+        buffer = self._start_text_stream(step)
+        try:
+            with self.client.beta.messages.stream(**request) as stream:
+                self._stream_opened(stream)
+                for delta in stream.text_stream:
+                    for line in buffer.feed(delta):
+                        self._handle_streamed_line(step, line, combined_results)
+                for line in buffer.flush():
+                    self._handle_streamed_line(step, line, combined_results)
+                step.response = stream.get_final_message()
+        except Exception as e:
+            self._check_authentication(e)
+            raise
+        return step.response
+
+    def _consume_tool_stream(self, step: StepState, request: Dict[str, Any],
+                             combined_results: List[Dict[str, Any]]) -> Any:
+        """Open one stream and run each tool call as soon as its block is complete"""
+        step.tool_calls = []
+        try:
+            with self.client.beta.messages.stream(**request) as stream:
+                self._stream_opened(stream)
+                for event in stream:
+                    block = self._completed_tool_block(event)
+                    if block is not None:
+                        self._run_streamed_tool_call(step, block)
+                step.response = stream.get_final_message()
+        except Exception as e:
+            self._check_authentication(e)
+            raise
+        self._run_remaining_tool_calls(step)
+        return step.response
+
+    @staticmethod
+    def _start_text_stream(step: StepState) -> LineBuffer:
+        """Reset what a (re)tried text stream fills in and return its line buffer"""
+        step.completed = False
+        step.parse_errors = []
+        return LineBuffer()
+
+    def _stream_opened(self, stream: Any) -> None:
+        self.request_scheduler.observe(getattr(getattr(stream, 'response', None), 'headers', None))
+        self._mark_key_validated()
+
+    @staticmethod
+    def _completed_tool_block(event: Any) -> Any:
+        """The tool_use block a stream event finishes, if any"""
+        block = getattr(event, 'content_block', None) if event.type == 'content_block_stop' else None
+        return block if block is not None and block.type == 'tool_use' else None
+
+    def _run_streamed_tool_call(self, step: StepState, block: Any) -> None:
+        call = ToolCall.from_block(block)
+        step.tool_calls.append(call)
+        step.actions.extend(call.actions)
+        if not self.should_stop:
+            self._execute_tool_call(call)
+
+    def _run_remaining_tool_calls(self, step: StepState) -> None:
+        """Run tool calls the stream events did not carry (older SDK versions)"""
+        ran = {call.id for call in step.tool_calls}
+        for block in step.response.content:
+            if getattr(block, 'type', None) == 'tool_use' and block.id not in ran:
+                self._run_streamed_tool_call(step, block)
+
+    def _handle_streamed_line(self, step: StepState, line: str,
+                              combined_results: List[Dict[str, Any]]) -> None:
+        """Parse and execute one completed streamed line"""
+        if step.completed or COMPLETED.search(line):
+            step.completed = True
+            return
+        parsed = parse_action_line(line)
+        if parsed is None:
+            return
+        if isinstance(parsed, ParseError):
+            step.parse_errors.append(parsed)
+            self._log_parse_error(parsed)
+            return
+        if not self.should_stop:
+            step.actions.append(parsed)
+            result = self.execute_tool_action(parsed.kind, parsed.tool_input())
+            if result and result.get("type") != "error":
+                combined_results.append(result)
+
+    def _finish_streamed_step(self, step: StepState, combined_results: List[Dict[str, Any]]) -> None:
+        self._log_usage(step.response)
+        if step.actions or step.parse_errors:
+            step.result = self._combined_result(step, combined_results)
+
+    def _request_next_response(self) -> Any:
+        """Send the conversation, retrying without images on a safety refusal"""
+        try:
+            return self._create_message(self.conversation_history, max_tokens=512)
+        except Exception as api_error:
+            if not self._is_safety_refusal(api_error):
+                raise
+            if self.should_stop:
+                return None
+            self.logger.add_entry("System", "Retrying without screenshot...")
+            return self._create_message(self._text_only(self.conversation_history), max_tokens=1024)
+
+    @classmethod
+    def _text_only(cls, messages: List[Dict]) -> List[Dict]:
+        """Remove screenshot content from messages"""
+        return [
+            {
+                "role": msg["role"],
+                "content": cls._without_images(msg["content"])
+            }
+            for msg in messages
+        ]
+
+    @classmethod
+    def _without_images(cls, content: List[Dict]) -> List[Dict]:
+        blocks = []
+        for c in content:
+            if c["type"] == "image":
+                continue
+            if c["type"] == "tool_result" and isinstance(c.get("content"), list):
+                # tool_use/tool_result pairs must stay, only their screenshots go
+                c = dict(c, content=cls._without_images(c["content"]))
+            blocks.append(c)
+        return blocks
+
+    def get_system_prompt(self) -> str:
+        """Return the system prompt, built once so the cached prefix stays byte-identical"""
+        action_format = self.config.get_setting('action_format', 'tool_use')
+        if action_format not in self._system_prompts:
+            self._system_prompts[action_format] = self.create_system_prompt()
+        return self._system_prompts[action_format]
+
+    def _build_request(self, messages: List[Dict], max_tokens: int) -> Dict[str, Any]:
+        """Build the keyword arguments of a computer-use API call.
+
+        With prompt caching on, cache breakpoints are placed on the system
+        prompt (which also covers the tool definition before it) and on the
+        last block of the turn before the newest message. The previous
+        request's prefix is read from the cache unless the image window has
+        just dropped images, which it does 'history_image_step' at a time.
+        """
+        # Window images and trim text to the budget; the stored history is untouched
+        messages = self.history_manager.build(messages)
+        self.logger.add_entry("Debug",
+            f"Request: {len(messages)} messages, ~{estimate_message_tokens(messages)} input tokens"
+        )
+        
+        caching = self.config.get_setting('prompt_caching', True)
+        messages = self.screenshot_manager.materialize_messages(messages)
+        
+        system_block = {"type": "text", "text": self.get_system_prompt()}
+        betas = ["computer-use-2024-10-22"]
+        if caching:
+            system_block["cache_control"] = {"type": "ephemeral"}
+            betas.append("prompt-caching-2024-07-31")
+            if len(messages) >= 2:
+                messages = list(messages)
+                prefix_end = messages[-2]
+                content = prefix_end.get("content")
+                if isinstance(content, list) and content:
+                    content = list(content)
+                    content[-1] = dict(content[-1], cache_control={"type": "ephemeral"})
+                    messages[-2] = dict(prefix_end, content=content)
+        
+        return {
+            "model": "claude-3-5-sonnet-20241022",
+            "max_tokens": max_tokens,
+            "temperature": 0,
+            "system": [system_block],
+            "messages": messages,
+            "tools": [{
+                "type": "computer_20241022",
+                "name": "computer",
+                "display_width_px": self.target_width,
+                "display_height_px": self.target_height,
+                "display_number": 1
+            }],
+            "betas": betas
+        }
+
+    def _log_usage(self, response: Any) -> None:
+        """Log token usage including prompt cache reads and writes"""
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return
+        self.logger.add_entry("Debug",
+            f"Usage: input {getattr(usage, 'input_tokens', 0)}, "
+            f"output {getattr(usage, 'output_tokens', 0)}, "
+            f"cache read {getattr(usage, 'cache_read_input_tokens', 0) or 0}, "
+            f"cache write {getattr(usage, 'cache_creation_input_tokens', 0) or 0}"
+        )
+
+    def _estimate_request_tokens(self, messages: List[Dict]) -> int:
+        """Estimate the input tokens of the request built from messages"""
+        return estimate_message_tokens(self.history_manager.build(messages))
+
+    def _send_request(self, request: Dict[str, Any]) -> Any:
+        """Send one request, recording its rate-limit headers"""
+        try:
+            raw = self.client.beta.messages.with_raw_response.create(**request)
+        except Exception as e:
+            self._check_authentication(e)
+            raise
+        return self._received(raw).parse()
+
+    def _received(self, raw: Any) -> Any:
+        """Record the rate-limit headers of a raw response"""
+        self.request_scheduler.observe(raw.headers)
+        self._mark_key_validated()
+        return raw
+
+    def _check_authentication(self, error: Exception) -> None:
+        """Turn a rejected key on a lazily validated client into a clear error"""
+        if getattr(error, 'status_code', None) in (401, 403):
+            self.api_key_validated = False
+            raise Exception(f"Failed to validate API key: {str(error)}") from error
+
+    def _mark_key_validated(self) -> None:
+        if not self.api_key_validated:
+            self.api_key_validated = True
+            self.logger.add_entry("System", "API key validated")
+
+    def _create_message(self, messages: List[Dict], max_tokens: int) -> Any:
+        """Send one computer-use API call through the shared request builder"""
+        request = self._build_request(messages, max_tokens)
+        cache_key, cached = self._cached_response(request)
+        if cached is not None:
+            return cached
+        response = self.request_scheduler.call(
+            lambda: self._send_request(request),
+            estimated_tokens=self._estimate_request_tokens(messages)
+        )
+        self._log_usage(response)
+        if cache_key:
+            self.response_cache.put(cache_key, response)
+        return response
+
+    def _cached_response(self, request: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+        """Cache key of a request and its stored response, if any"""
+        cache_key = self._response_cache_key(request)
+        return cache_key, self.response_cache.get(cache_key) if cache_key else None
+
+    def _response_cache_key(self, request: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a request, or None when the response cache is off"""
+        if not self.response_cache.enabled:
+            return None
+        try:
+            return self.response_cache.key(request)
+        except Exception as e:
+            self.logger.add_entry("Error", f"Failed to hash request for the response cache: {str(e)}")
+            return None
+
+    def get_request_metrics(self) -> Dict[str, Any]:
+        """Return retry and throttling counters of the request scheduler"""
+        return self.request_scheduler.metrics()
 
     def execute_tool_action(self, action: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a tool action using the action handler"""
@@ -487,14 +975,6 @@ Output example (ex,, when latest screenshot is observed to indicate the completi
             # Execute the action using the handler
             result = self.action_handler.execute_action(action, tool_input)
             
-            # Update conversation state based on action result
-            if action == 'screenshot':
-                # Get latest screenshot data after taking it
-                current_screenshot = self.screenshot_manager.get_current_screenshot()
-                if current_screenshot:
-                    # Store the latest screenshot data
-                    self.current_screenshot = current_screenshot
-            
             # Log the result
             if result.get("type") == "error":
                 self.logger.add_entry("Error", f"Action failed: {result.get('error', 'Unknown error')}")
@@ -0,0 +1,276 @@
+# computeruse/core/request_scheduler.py
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+# Status codes worth retrying: timeouts, lock conflicts, rate limits and
+# server-side overload (529 is the API's "overloaded" status)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+THROTTLE_WINDOW = 60.0
+
+
+class TokenThrottle:
+    """Sliding one-minute window of input tokens sent through this process.
+
+    Reservations are recorded when a request is sent and corrected to the
+    reported usage once the response arrives.
+    """
+    def __init__(self, tokens_per_minute: int):
+        self.tokens_per_minute = int(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._window: Deque[List[float]] = deque()
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve tokens now and return 0, or return the seconds to wait first"""
+        with self._lock:
+            now = time.time()
+            while self._window and now - self._window[0][0] >= THROTTLE_WINDOW:
+                self._window.popleft()
+            used = sum(entry[1] for entry in self._window)
+            # An oversized request is let through on an empty window rather than blocking forever
+            if self._window and used + tokens > self.tokens_per_minute:
+                freed = 0.0
+                for sent_at, sent_tokens in self._window:
+                    freed += sent_tokens
+                    if used - freed + tokens <= self.tokens_per_minute:
+                        return max(0.01, sent_at + THROTTLE_WINDOW - now)
+                return max(0.01, self._window[-1][0] + THROTTLE_WINDOW - now)
+            self._window.append([now, float(tokens)])
+            return 0.0
+
+    def correct(self, estimated: int, actual: int) -> None:
+        """Replace the newest matching reservation with the reported usage"""
+        with self._lock:
+            for entry in reversed(self._window):
+                if entry[1] == float(estimated):
+                    entry[1] = float(actual)
+                    return
+
+
+_shared_throttles: Dict[int, TokenThrottle] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_throttle(tokens_per_minute: int) -> TokenThrottle:
+    """Return the process-wide throttle for a tokens-per-minute ceiling"""
+    with _shared_lock:
+        if tokens_per_minute not in _shared_throttles:
+            _shared_throttles[tokens_per_minute] = TokenThrottle(tokens_per_minute)
+        return _shared_throttles[tokens_per_minute]
+
+
+class RequestCancelled(Exception):
+    """Raised when a stop request interrupts a backoff or throttle wait"""
+
+
+class RequestScheduler:
+    """Retries and paces Anthropic API calls.
+
+    Retryable failures (429, 5xx, 529, connection errors) are retried with
+    full-jitter exponential backoff, honouring retry-after when the API
+    sends it. Rate-limit headers from each response are remembered so the
+    next request waits for the reset instead of running into a 429, and an
+    optional tokens-per-minute ceiling is enforced across every session in
+    the process.
+    """
+    def __init__(self, config, logger, should_stop: Optional[Callable[[], bool]] = None):
+        self.config = config
+        self.logger = logger
+        self.should_stop = should_stop or (lambda: False)
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self._tokens_remaining: Optional[int] = None
+        self._metrics = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "retry_wait_s": 0.0,
+            "throttle_events": 0,
+            "throttled_s": 0.0
+        }
+
+    @property
+    def throttle(self) -> Optional[TokenThrottle]:
+        limit = int(self.config.get_setting('api_tokens_per_minute', 0) or 0)
+        return shared_throttle(limit) if limit > 0 else None
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return retry and throttle counters for this scheduler"""
+        with self._lock:
+            return dict(self._metrics)
+
+    def call(self, send: Callable[[], Any], estimated_tokens: int = 0,
+             can_retry: Optional[Callable[[], bool]] = None) -> Any:
+        """Run send() under pacing and retries and return its result"""
+        attempt = 0
+        while True:
+            delay = self._pace(estimated_tokens)
+            if delay > 0:
+                self._sleep(delay, "throttled")
+                continue
+            self._count("requests")
+            try:
+                response = send()
+            except Exception as error:
+                delay = self._retry_delay(error, attempt, can_retry)
+                if delay is None:
+                    raise
+                attempt += 1
+                self._sleep(delay, "retry_wait_s")
+                continue
+            self._record_usage(response, estimated_tokens)
+            return response
+
+    async def acall(self, send: Callable[[], Awaitable[Any]], estimated_tokens: int = 0,
+                    can_retry: Optional[Callable[[], bool]] = None) -> Any:
+        """Async counterpart of call(); waits are cancellable awaits"""
+        attempt = 0
+        while True:
+            delay = self._pace(estimated_tokens)
+            if delay > 0:
+                self._add_wait("throttled", delay)
+                await asyncio.sleep(delay)
+                continue
+            self._count("requests")
+            try:
+                response = await send()
+            except Exception as error:
+                delay = self._retry_delay(error, attempt, can_retry)
+                if delay is None:
+                    raise
+                attempt += 1
+                self._add_wait("retry_wait_s", delay)
+                await asyncio.sleep(delay)
+                continue
+            self._record_usage(response, estimated_tokens)
+            return response
+
+    def observe(self, headers: Any) -> None:
+        """Remember the rate-limit state reported in response headers"""
+        if not headers:
+            return
+        now = time.time()
+        blocked_until = 0.0
+        tokens_remaining = None
+        for kind in ("requests", "tokens", "input-tokens", "output-tokens"):
+            remaining = _int_header(headers, f"anthropic-ratelimit-{kind}-remaining")
+            if remaining is None:
+                continue
+            if kind in ("tokens", "input-tokens"):
+                tokens_remaining = remaining if tokens_remaining is None else min(tokens_remaining, remaining)
+            if remaining <= 0:
+                reset = _reset_header(headers.get(f"anthropic-ratelimit-{kind}-reset"), now)
+                blocked_until = max(blocked_until, reset)
+        with self._lock:
+            self._blocked_until = blocked_until
+            self._tokens_remaining = tokens_remaining
+
+    def _pace(self, estimated_tokens: int) -> float:
+        """Seconds to wait before the next request may be sent"""
+        with self._lock:
+            header_wait = max(0.0, self._blocked_until - time.time())
+            if (not header_wait and self._tokens_remaining is not None
+                    and 0 < self._tokens_remaining < estimated_tokens):
+                # Not enough budget left this window; wait for the refill
+                header_wait = 1.0
+                self._tokens_remaining = None
+        if header_wait > 0:
+            return header_wait
+        throttle = self.throttle
+        return throttle.reserve(estimated_tokens) if throttle and estimated_tokens > 0 else 0.0
+
+    def _retry_delay(self, error: Exception, attempt: int,
+                     can_retry: Optional[Callable[[], bool]]) -> Optional[float]:
+        """Backoff before retrying error, or None if it should propagate"""
+        status = getattr(error, 'status_code', None)
+        if status is None:
+            retryable = type(error).__name__ in ('APIConnectionError', 'APITimeoutError')
+        else:
+            retryable = status in RETRYABLE_STATUS
+        max_retries = int(self.config.get_setting('api_max_retries', 5))
+        if not retryable or attempt >= max_retries or (can_retry and not can_retry()):
+            if retryable:
+                self._count("failures")
+            return None
+
+        base = float(self.config.get_setting('api_backoff_base', 1.0))
+        cap = float(self.config.get_setting('api_backoff_max', 60.0))
+        delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+        response = getattr(error, 'response', None)
+        if response is not None:
+            self.observe(response.headers)
+            retry_after = _float_header(response.headers, 'retry-after')
+            if retry_after is not None:
+                delay = min(cap, retry_after + random.uniform(0, base))
+
+        self._count("retries")
+        self.logger.add_entry("System",
+            f"API request failed ({status or type(error).__name__}); "
+            f"retry {attempt + 1}/{max_retries} in {delay:.1f}s"
+        )
+        return delay
+
+    def _record_usage(self, response: Any, estimated_tokens: int) -> None:
+        usage = getattr(response, 'usage', None)
+        throttle = self.throttle
+        if usage is None or throttle is None or estimated_tokens <= 0:
+            return
+        actual = (getattr(usage, 'input_tokens', 0) or 0) \
+            + (getattr(usage, 'cache_creation_input_tokens', 0) or 0)
+        if actual:
+            throttle.correct(estimated_tokens, actual)
+
+    def _sleep(self, seconds: float, metric: str) -> None:
+        if seconds <= 0:
+            return
+        self._add_wait(metric, seconds)
+        deadline = time.time() + seconds
+        while time.time() < deadline:
+            if self.should_stop():
+                raise RequestCancelled("Request cancelled while waiting to send")
+            time.sleep(min(0.1, max(0.0, deadline - time.time())))
+
+    def _add_wait(self, metric: str, seconds: float) -> None:
+        with self._lock:
+            if metric == "throttled":
+                self._metrics["throttle_events"] += 1
+                self._metrics["throttled_s"] += seconds
+            else:
+                self._metrics[metric] += seconds
+
+    def _count(self, metric: str) -> None:
+        with self._lock:
+            self._metrics[metric] += 1
+
+
+def _int_header(headers: Any, name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _float_header(headers: Any, name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _reset_header(value: Optional[str], now: float) -> float:
+    """Convert an RFC 3339 reset timestamp to epoch seconds"""
+    if not value:
+        return now + 1.0
+    try:
+        reset = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if reset.tzinfo is None:
+            reset = reset.replace(tzinfo=timezone.utc)
+        return reset.timestamp()
+    except ValueError:
+        return now + 1.0
@@ -0,0 +1,166 @@
+# computeruse/core/response_cache.py
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+import numpy as np
+from PIL import Image
+from anthropic.types.beta import BetaMessage
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".computeruse", "response_cache")
+# Action-result fields that vary between otherwise identical runs (timings, encoded sizes)
+VOLATILE_FIELDS = re.compile(r'"(waited|elapsed|size|encode_ms|timestamp|quality)": -?[0-9][0-9.e+-]*')
+
+
+def perceptual_hash(data: bytes, size: int = 16) -> str:
+    """Average hash of an encoded image, so re-encodes of the same screen match"""
+    image = Image.open(BytesIO(data))
+    # Let the JPEG decoder downscale with DCT scaling instead of decoding at full size
+    image.draft('L', (size * 8, size * 8))
+    thumb = np.asarray(image.convert('L').resize((size, size), Image.Resampling.BOX))
+    bits = np.packbits((thumb > thumb.mean()).flatten())
+    return f"{image.size[0]}x{image.size[1]}:{bits.tobytes().hex()}"
+
+
+class ResponseCache:
+    """Opt-in on-disk memo of API responses keyed by a canonical request hash.
+
+    Image payloads are reduced to perceptual hashes before hashing, so an
+    identical screen yields the same key even if its JPEG bytes differ.
+    Entries expire after 'response_cache_ttl' seconds and the least
+    recently used ones are evicted beyond 'response_cache_max_entries'.
+    """
+    def __init__(self, config, logger):
+        self.config = config
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config.get_setting('response_cache', False))
+
+    @property
+    def directory(self) -> str:
+        return self.config.get_setting('response_cache_dir') or DEFAULT_CACHE_DIR
+
+    def key(self, request: Dict[str, Any]) -> str:
+        """Canonical hash of the request kwargs with images replaced by perceptual hashes"""
+        canonical = dict(request, messages=[self._canonical_message(m) for m in request.get("messages", [])])
+        payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[BetaMessage]:
+        """Return the cached response for key, or None on a miss or expired entry"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            ttl = float(self.config.get_setting('response_cache_ttl', 86400))
+            if ttl > 0 and time.time() - entry["created"] > ttl:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            response = BetaMessage.model_validate(entry["response"])
+            # Touch for LRU ordering
+            os.utime(path, None)
+        except (OSError, ValueError, KeyError):
+            self._count("misses")
+            return None
+        self._count("hits")
+        self.logger.add_entry("Debug", f"Response cache hit {key[:12]} ({self.hit_rate():.0%} hit rate)")
+        return response
+
+    def put(self, key: str, response: Any) -> None:
+        """Store a response and evict the least recently used entries over the limit"""
+        if not hasattr(response, 'model_dump'):
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"created": time.time(), "response": response.model_dump(mode='json')}, f)
+            os.replace(temp_path, path)
+            self._count("stores")
+            self._evict()
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.add_entry("Error", f"Failed to store cached response: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/store/eviction counters and the hit rate"""
+        with self._lock:
+            return dict(self._stats, hit_rate=self._hit_rate())
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            return self._hit_rate()
+
+    def _hit_rate(self) -> float:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return self._stats["hits"] / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        """Delete every cached response"""
+        for name in self._entries():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _canonical_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        content = message.get("content")
+        if not isinstance(content, list):
+            return message
+        return dict(message, content=self._canonical_blocks(content))
+
+    def _canonical_blocks(self, content: List[Any]) -> List[Any]:
+        blocks = []
+        for block in content:
+            if not isinstance(block, dict):
+                blocks.append(block)
+                continue
+            source = block.get("source")
+            if block.get("type") == "image" and source and source.get("type") == "base64":
+                block = {"type": "image", "phash": perceptual_hash(base64.b64decode(source["data"]))}
+            elif block.get("type") == "tool_result" and isinstance(block.get("content"), list):
+                block = {k: v for k, v in block.items() if k != "cache_control"}
+                block["content"] = self._canonical_blocks(block["content"])
+            else:
+                # Cache breakpoints move every turn and do not change the reply
+                block = {k: v for k, v in block.items() if k != "cache_control"}
+                if block.get("type") == "text":
+                    block["text"] = VOLATILE_FIELDS.sub(r'"\1": "*"', block.get("text", ""))
+            blocks.append(block)
+        return blocks
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _entries(self):
+        try:
+            return [name for name in os.listdir(self.directory) if name.endswith(".json")]
+        except OSError:
+            return []
+
+    def _evict(self) -> None:
+        max_entries = int(self.config.get_setting('response_cache_max_entries', 500))
+        names = self._entries()
+        if len(names) <= max_entries:
+            return
+        paths = [os.path.join(self.directory, name) for name in names]
+        paths.sort(key=lambda path: os.path.getmtime(path))
+        for path in paths[:len(paths) - max_entries]:
+            try:
+                os.remove(path)
+                self._count("evictions")
+            except OSError:
+                pass
+
+    def _count(self, metric: str) -> None:
+        with self._lock:
+            self._stats[metric] += 1
@@ -1,13 +1,19 @@
-# computeruse/core/screenshot_manager.py
 import pyautogui
+import numpy as np
 from PIL import Image
 import base64
-from io import BytesIO
-from typing import Dict, Tuple, Optional
+from typing import Any, Callable, Dict, List, Tuple, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
 import time
+from .image_encoder import JpegEncoder
+from .image_resize import resize_frame
+from .frame_history import FrameHistory
+from .image_tokens import estimate_image_tokens
 
 # computeruse/core/screenshot_manager.py
 class ScreenshotManager:
+    """Single capture service owning the versioned frame store"""
     def __init__(self, config, logger):
         self.config = config
         self.logger = logger
@@ -15,10 +21,35 @@ class ScreenshotManager:
         # Get current scale from config
         self.current_scale = float(config.get_setting('downscale_factor'))
         
-        # Initialize state
+        # Frame store state
         self.current_screenshot = None
+        self.frame_id = 0
         self.last_screenshot_time = 0
         self.min_screenshot_interval = 0.5
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict], None]] = []
+        self.encoder = JpegEncoder(config, logger)
+        
+        # Payloads referenced by conversation messages, bounded in memory
+        self.history = FrameHistory(config, logger)
+        
+        # Single background worker so pipelined captures stay in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture")
+        
+        # Speculative capture made while a request is in flight
+        self._prefetch_future: Optional[Future] = None
+        self._prefetch_abort: Optional[threading.Event] = None
+        self.prefetch_stats = {"started": 0, "hits": 0, "misses": 0, "aborted": 0}
+        
+        # Change detection state
+        self.last_sent_frame_id = 0
+        self._last_hash: Optional[np.ndarray] = None
+        self._last_pixels: Optional[np.ndarray] = None
+        self._last_image: Optional[Image.Image] = None
+        self._sent_pixels: Optional[np.ndarray] = None
+        # Settle thumbnail of the latest capture, i.e. the screen before the next actions
+        self._settle_baseline: Optional[np.ndarray] = None
+        self._crops_since_keyframe = 0
         
         # Screen properties
         self.native_width, self.native_height = pyautogui.size()
@@ -31,52 +62,88 @@ class ScreenshotManager:
             f"Target resolution: {self.target_width}x{self.target_height}"
         )
     
+    def add_listener(self, callback: Callable[[Dict], None]) -> None:
+        """Register a callback invoked with every newly stored frame"""
+        self._listeners.append(callback)
 
     def take_screenshot(self) -> Dict:
+        """Capture, resize and encode a new frame into the frame store"""
         try:
-            # Double-check current scale
-            self.current_scale = float(self.config.get_setting('downscale_factor'))
-            
-            # Take screenshot at native resolution
-            screenshot = pyautogui.screenshot()
-            
-            # Calculate target dimensions
-            target_width = int(self.native_width * self.current_scale)
-            target_height = int(self.native_height * self.current_scale)
-            
-            # Resize to target resolution
-            screenshot = screenshot.resize(
-                (target_width, target_height),
-                Image.Resampling.LANCZOS
-            )
-            
-            # Save with quality settings
-            buffered = BytesIO()
-            screenshot.save(
-                buffered,
-                format="JPEG",
-                quality=self.config.get_setting('screenshot_quality', 60),
-                optimize=True
-            )
+            prefetched = self._claim_prefetch()
+            with self._lock:
+                # Double-check current scale
+                self.current_scale = float(self.config.get_setting('downscale_factor'))
+                
+                # Calculate target dimensions
+                target_width = int(self.native_width * self.current_scale)
+                target_height = int(self.native_height * self.current_scale)
+                
+                # Reuse the frame prefetched during inference if the screen still matches it
+                if prefetched is not None and self._prefetch_matches(prefetched, target_width, target_height):
+                    candidate = prefetched
+                else:
+                    candidate = self._capture_candidate(target_width, target_height, self.current_scale,
+                                                        with_thumbnail=True)
+                if candidate["thumbnail"] is not None:
+                    self._settle_baseline = candidate["thumbnail"]
+                
+                # Skip encoding entirely when nothing visible changed
+                if self.current_screenshot and not self._has_changed(candidate["hash"], candidate["pixels"]):
+                    self.last_screenshot_time = time.time()
+                    frame = None
+                else:
+                    if candidate.get("jpeg_bytes") is None:
+                        candidate["jpeg_bytes"], candidate["encode_info"] = self.encoder.encode(candidate["image"])
+                    jpeg_bytes, encode_info = candidate["jpeg_bytes"], candidate["encode_info"]
+                    size_kb = len(jpeg_bytes) / 1024
+                    
+                    self.frame_id += 1
+                    self.last_screenshot_time = time.time()
+                    self._last_hash = candidate["hash"]
+                    self._last_pixels = candidate["pixels"]
+                    self._last_image = candidate["image"]
+                    self.current_screenshot = {
+                        "frame_id": self.frame_id,
+                        # Raw JPEG bytes shared by the preview and the API path;
+                        # base64 happens only when a request is serialized
+                        "image_bytes": jpeg_bytes,
+                        "size": size_kb,
+                        "resolution": f"{target_width}x{target_height}",
+                        "scale_factor": self.current_scale,
+                        "resize_mode": candidate["resize_mode"],
+                        "quality": encode_info["quality"],
+                        "encode_ms": encode_info["encode_ms"],
+                        "timestamp": self.last_screenshot_time
+                    }
+                    frame = self.current_screenshot
+                current_id = self.frame_id
             
-            img_str = base64.b64encode(buffered.getvalue()).decode()
-            size_kb = len(buffered.getvalue()) / 1024
-            
-            self.current_screenshot = {
-                "image_data": img_str,
-                "size": size_kb,
-                "resolution": f"{target_width}x{target_height}",
-                "scale_factor": self.current_scale,
-                "timestamp": time.time()
-            }
+            if frame is None:
+                self.logger.add_entry("System", f"Screen unchanged since frame #{current_id}")
+                return {
+                    "type": "screenshot_unchanged",
+                    "frame_id": current_id,
+                    "resolution": f"{target_width}x{target_height}",
+                    "scale_factor": self.current_scale
+                }
             
             self.logger.add_entry("System", 
-                f"Screenshot: {target_width}x{target_height} "
-                f"[scale: {self.current_scale:.1f}, size: {size_kb:.1f}KB]"
+                f"Screenshot #{frame['frame_id']}: {target_width}x{target_height} "
+                f"[scale: {self.current_scale:.1f}, size: {size_kb:.1f}KB, "
+                f"quality: {encode_info['quality']}, encode: {encode_info['encode_ms']:.0f}ms, "
+                f"~{estimate_image_tokens(target_width, target_height)} tokens"
+                f"{', prefetched' if candidate is prefetched else ''}]"
             )
             
+            for listener in self._listeners:
+                try:
+                    listener(frame)
+                except Exception as e:
+                    self.logger.add_entry("Error", f"Screenshot listener failed: {str(e)}")
+            
             return {
                 "type": "screenshot_taken",
+                "frame_id": frame["frame_id"],
                 "resolution": f"{target_width}x{target_height}",
                 "scale_factor": self.current_scale
             }
@@ -84,6 +151,472 @@ class ScreenshotManager:
         except Exception as e:
             self.logger.add_entry("Error", f"Screenshot failed: {str(e)}")
             return {"type": "error", "error": str(e)}
+
+    def _capture_candidate(self, target_width: int, target_height: int, scale: float,
+                           with_thumbnail: bool = False) -> Dict[str, Any]:
+        """Capture and resize a frame without touching the frame store"""
+        # Take screenshot at native resolution
+        capture = pyautogui.screenshot()
+        thumbnail = settle_thumbnail(capture, self.config) if with_thumbnail else None
+        
+        # Resize to target resolution with the configured strategy
+        image, resize_mode = resize_frame(
+            capture,
+            (target_width, target_height),
+            scale,
+            self.config.get_setting('resize_mode', 'auto')
+        )
+        return {
+            "image": image,
+            "resize_mode": resize_mode,
+            "size": (target_width, target_height),
+            "pixels": np.asarray(image.convert('L'), dtype=np.int16),
+            "hash": self._compute_hash(image),
+            "thumbnail": thumbnail,
+            "jpeg_bytes": None,
+            "encode_info": None
+        }
+
+    def start_prefetch(self, delay: float = 0.0) -> None:
+        """Speculatively capture and pre-encode a candidate frame on the worker.
+
+        Meant to run while a request is in flight: the next take_screenshot()
+        checks a cheap thumbnail against the candidate and, if the screen
+        has not changed since, stores it without resizing or encoding again.
+        """
+        if not self.config.get_setting('speculative_prefetch', True):
+            return
+        self.cancel_prefetch()
+        abort = threading.Event()
+        scale = float(self.config.get_setting('downscale_factor'))
+        size = (int(self.native_width * scale), int(self.native_height * scale))
+        
+        def prefetch() -> Optional[Dict[str, Any]]:
+            if abort.wait(max(0.0, delay)):
+                return None
+            candidate = self._capture_candidate(size[0], size[1], scale, with_thumbnail=True)
+            # A frame identical to the stored one needs no encoding
+            if self.current_screenshot is None or self._has_changed(candidate["hash"], candidate["pixels"]):
+                candidate["jpeg_bytes"], candidate["encode_info"] = self.encoder.encode(candidate["image"])
+            return candidate
+        
+        self._prefetch_abort = abort
+        self._prefetch_future = self._executor.submit(prefetch)
+        self.prefetch_stats["started"] += 1
+
+    def stop_prefetch_wait(self) -> None:
+        """Keep a prefetch that has not started capturing from starting later"""
+        if self._prefetch_abort is not None:
+            self._prefetch_abort.set()
+
+    def cancel_prefetch(self) -> None:
+        """Drop any pending or finished prefetch"""
+        self.stop_prefetch_wait()
+        self._prefetch_future = None
+        self._prefetch_abort = None
+
+    def has_prefetch(self) -> bool:
+        return self._prefetch_future is not None
+
+    def _claim_prefetch(self) -> Optional[Dict[str, Any]]:
+        future = self._prefetch_future
+        if future is None:
+            return None
+        self.cancel_prefetch()
+        try:
+            candidate = future.result()
+        except Exception as e:
+            self.logger.add_entry("Error", f"Prefetch capture failed: {str(e)}")
+            return None
+        if candidate is None:
+            self.prefetch_stats["aborted"] += 1
+        return candidate
+
+    def _prefetch_matches(self, candidate: Dict[str, Any], target_width: int, target_height: int) -> bool:
+        """True if the screen still looks like the prefetched candidate"""
+        if candidate["size"] != (target_width, target_height) or candidate["thumbnail"] is None:
+            self.prefetch_stats["misses"] += 1
+            return False
+        current = self._capture_thumbnail()
+        tolerance = int(self.config.get_setting('change_pixel_tolerance', 16))
+        max_pixels = int(self.config.get_setting('change_max_pixels', 0))
+        matches = (current.shape == candidate["thumbnail"].shape
+                   and np.count_nonzero(np.abs(current - candidate["thumbnail"]) > tolerance) <= max_pixels)
+        self.prefetch_stats["hits" if matches else "misses"] += 1
+        return matches
     
+    def capture_async(self, delay: float = 0.0) -> Future:
+        """Capture and encode a frame on the background worker.
+
+        Returns a future resolving to the take_screenshot() result, so the
+        caller can overlap encoding with a settle wait or an API call.
+        """
+        # A prefetch still waiting out its delay would hold up the single worker
+        self.stop_prefetch_wait()
+        def capture() -> Dict:
+            if delay > 0:
+                time.sleep(delay)
+            return self.take_screenshot()
+        return self._executor.submit(capture)
+
+    def _capture_thumbnail(self) -> np.ndarray:
+        """Capture a low-resolution grayscale frame for settle polling"""
+        return settle_thumbnail(pyautogui.screenshot(), self.config)
+
+    def settle_baseline(self) -> Optional[np.ndarray]:
+        """Settle thumbnail of the latest capture, taken before the actions that followed it"""
+        return self._settle_baseline
+
+    def wait_until_stable(self, timeout: float,
+                          should_stop: Optional[Callable[[], bool]] = None,
+                          baseline: Optional[np.ndarray] = None,
+                          min_unchanged: float = 0.0) -> Dict:
+        """Poll low-resolution frames until the screen stops changing.
+
+        Returns as soon as 'settle_frames' consecutive polls match, or when
+        the timeout is reached. The first poll is compared against baseline
+        (by default the latest capture's thumbnail), so a reaction that
+        finished before polling started still counts as a change. If no
+        change is seen, waiting continues for at least min_unchanged seconds
+        so that explicit waits still catch slow starts (e.g. an app launch).
+        With 'settle_detection' disabled this is a plain sleep.
+        """
+        start = time.time()
+        if not self.config.get_setting('settle_detection', True) or timeout <= 0:
+            time.sleep(max(0.0, timeout))
+            return {"type": "settle", "stable": False, "elapsed": timeout, "polls": 0}
+        
+        interval = float(self.config.get_setting('settle_interval', 0.1))
+        required = max(1, int(self.config.get_setting('settle_frames', 3)))
+        tolerance = int(self.config.get_setting('change_pixel_tolerance', 16))
+        
+        previous = self._settle_baseline if baseline is None else baseline
+        matches = 0
+        polls = 0
+        saw_change = False
+        stable = False
+        while True:
+            if should_stop and should_stop():
+                break
+            try:
+                current = self._capture_thumbnail()
+            except Exception as e:
+                self.logger.add_entry("Error", f"Settle polling failed, sleeping instead: {str(e)}")
+                time.sleep(max(0.0, timeout - (time.time() - start)))
+                break
+            polls += 1
+            
+            if previous is not None and previous.shape == current.shape:
+                if np.count_nonzero(np.abs(current - previous) > tolerance) == 0:
+                    matches += 1
+                else:
+                    matches = 0
+                    saw_change = True
+            previous = current
+            
+            elapsed = time.time() - start
+            if matches >= required and (saw_change or elapsed >= min_unchanged):
+                stable = True
+                break
+            if elapsed + interval > timeout:
+                time.sleep(max(0.0, timeout - elapsed))
+                break
+            time.sleep(interval)
+        
+        elapsed = time.time() - start
+        self.logger.add_entry("Debug",
+            f"Screen {'settled' if stable else 'not settled'} after {elapsed:.2f}s "
+            f"({polls} polls, cap {timeout:.1f}s)"
+        )
+        return {"type": "settle", "stable": stable, "elapsed": elapsed, "polls": polls}
+
+    def take_settled_screenshot(self, settle_time: float,
+                                should_stop: Optional[Callable[[], bool]] = None) -> Dict:
+        """Capture the post-action frame, encoding it while the screen settles.
+
+        A frame is captured and encoded right away in the background; once
+        the screen is stable (capped at settle_time) a second capture is
+        compared against it and only re-encoded if the screen kept changing.
+        The wall time is then the longer of encode and settle rather than
+        their sum.
+        """
+        # Read before the early capture below replaces it
+        baseline = self._settle_baseline
+        if not self.config.get_setting('pipelined_capture', True):
+            self.wait_until_stable(settle_time, should_stop, baseline)
+            return self.take_screenshot()
+        
+        pending = self.capture_async()
+        self.wait_until_stable(settle_time, should_stop, baseline)
+        early_result = pending.result()
+        if early_result.get("type") == "error":
+            return self.take_screenshot()
+        
+        result = self.take_screenshot()
+        if result.get("type") == "screenshot_unchanged":
+            # The early frame is still current; report it as the capture
+            return dict(early_result, frame_id=result["frame_id"])
+        return result
+
+    def shutdown(self) -> None:
+        """Stop the background capture worker"""
+        self.cancel_prefetch()
+        self._executor.shutdown(wait=False)
+        self.history.close()
+
     def get_current_screenshot(self) -> Optional[Dict]:
-        return self.current_screenshot
\ No newline at end of file
+        return self.current_screenshot
+
+    def get_frame_id(self) -> int:
+        """Return the id of the latest stored frame (0 if none yet)"""
+        return self.frame_id
+
+    def _compute_hash(self, image: Image.Image) -> np.ndarray:
+        """Average hash of a heavily downsampled grayscale copy of the frame"""
+        size = int(self.config.get_setting('change_hash_size', 16))
+        thumb = np.asarray(image.convert('L').resize((size, size), Image.Resampling.BOX))
+        return thumb > thumb.mean()
+
+    def _has_changed(self, frame_hash: np.ndarray, pixels: np.ndarray) -> bool:
+        """Compare a new capture against the latest stored frame"""
+        if self._last_hash is None or self._last_pixels is None:
+            return True
+        if pixels.shape != self._last_pixels.shape:
+            return True
+        # Cheap reject: a different hash always means a visible change
+        if not np.array_equal(frame_hash, self._last_hash):
+            return True
+        # Hashes miss small edits (typed text, cursor), so confirm on pixels
+        tolerance = int(self.config.get_setting('change_pixel_tolerance', 16))
+        max_changed = int(self.config.get_setting('change_max_pixels', 0))
+        changed = np.count_nonzero(np.abs(pixels - self._last_pixels) > tolerance)
+        return changed > max_changed
+
+    def _find_dirty_regions(self, pixels: np.ndarray, base: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Return (left, top, right, bottom) boxes of the regions that differ from base.
+
+        The diff mask is pooled into square tiles, grown by a margin of
+        tiles for context, and grouped into 8-connected components.
+        """
+        tolerance = int(self.config.get_setting('change_pixel_tolerance', 16))
+        tile = int(self.config.get_setting('dirty_tile_size', 32))
+        margin = int(self.config.get_setting('dirty_tile_margin', 1))
+        
+        mask = np.abs(pixels - base) > tolerance
+        height, width = mask.shape
+        rows = -(-height // tile)
+        cols = -(-width // tile)
+        padded = np.zeros((rows * tile, cols * tile), dtype=bool)
+        padded[:height, :width] = mask
+        tiles = padded.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+        
+        # Grow dirty tiles so each crop carries some surrounding context
+        for _ in range(margin):
+            grown = tiles.copy()
+            grown[1:, :] |= tiles[:-1, :]
+            grown[:-1, :] |= tiles[1:, :]
+            grown[:, 1:] |= tiles[:, :-1]
+            grown[:, :-1] |= tiles[:, 1:]
+            tiles = grown
+        
+        regions = []
+        seen = np.zeros_like(tiles)
+        for row, col in zip(*np.nonzero(tiles)):
+            if seen[row, col]:
+                continue
+            seen[row, col] = True
+            stack = [(row, col)]
+            top, left, bottom, right = row, col, row, col
+            while stack:
+                r, c = stack.pop()
+                top, left = min(top, r), min(left, c)
+                bottom, right = max(bottom, r), max(right, c)
+                for nr in range(max(r - 1, 0), min(r + 2, rows)):
+                    for nc in range(max(c - 1, 0), min(c + 2, cols)):
+                        if tiles[nr, nc] and not seen[nr, nc]:
+                            seen[nr, nc] = True
+                            stack.append((nr, nc))
+            regions.append((
+                int(left * tile), int(top * tile),
+                int(min((right + 1) * tile, width)), int(min((bottom + 1) * tile, height))
+            ))
+        return regions
+
+    def _build_region_content(self, frame: Dict, base_frame_id: int) -> Optional[List[Dict[str, Any]]]:
+        """Build crop blocks for the changed regions.
+
+        Returns an empty list when nothing differs from the last sent frame
+        and None when a full frame should be sent instead.
+        """
+        if (not self.config.get_setting('dirty_regions', True)
+                or self._sent_pixels is None
+                or self._last_image is None
+                or self._sent_pixels.shape != self._last_pixels.shape):
+            return None
+        
+        regions = self._find_dirty_regions(self._last_pixels, self._sent_pixels)
+        if not regions:
+            return []
+        
+        # Send a full keyframe periodically so history windows never need
+        # crops older than the last few messages
+        keyframe_interval = int(self.config.get_setting('dirty_keyframe_interval', 3))
+        if keyframe_interval > 0 and self._crops_since_keyframe >= keyframe_interval:
+            return None
+        
+        height, width = self._last_pixels.shape
+        dirty_area = sum((r - l) * (b - t) for l, t, r, b in regions)
+        max_ratio = float(self.config.get_setting('dirty_max_area_ratio', 0.4))
+        max_regions = int(self.config.get_setting('dirty_max_regions', 4))
+        if len(regions) > max_regions or dirty_area > max_ratio * width * height:
+            return None
+        
+        content = [{
+            "type": "text",
+            "text": (
+                f"Screenshot frame #{frame['frame_id']}: only the regions below changed since "
+                f"frame #{base_frame_id}. Offsets are in the {frame['resolution']} screen coordinates."
+            )
+        }]
+        for left, top, right, bottom in regions:
+            crop_bytes, _ = self.encoder.encode(
+                self._last_image.crop((left, top, right, bottom)),
+                quality=frame["quality"]
+            )
+            content.append({
+                "type": "text",
+                "text": f"Region at offset ({left}, {top}), size {right - left}x{bottom - top}:"
+            })
+            content.append(self._image_block(
+                crop_bytes, frame["frame_id"], "crop", (right - left, bottom - top)
+            ))
+        
+        self.logger.add_entry("System",
+            f"Frame #{frame['frame_id']}: sending {len(regions)} changed region(s), "
+            f"{dirty_area / (width * height):.0%} of the screen"
+        )
+        return content
+
+    def _image_block(self, data: bytes, frame_id: int, kind: str,
+                     size: Tuple[int, int]) -> Dict[str, Any]:
+        """Store a payload in the history and return an image block referencing it"""
+        return {
+            "type": "image",
+            "source": {
+                "type": "frame_ref",
+                "media_type": "image/jpeg",
+                "ref": self.history.put(data),
+                "frame_id": frame_id,
+                "kind": kind,
+                "tokens": estimate_image_tokens(*size)
+            }
+        }
+
+    def materialize_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Resolve frame references into base64 image blocks for a request"""
+        return encode_image_sources(messages, self.history)
+
+    def build_image_content(self) -> List[Dict[str, Any]]:
+        """Build message content blocks for the latest frame.
+
+        Sends a short text notice instead of the image when the frame was
+        already sent to Claude and nothing changed since, and only crops of
+        the changed regions when a small part of the screen changed.
+        """
+        with self._lock:
+            frame = self.current_screenshot
+            if not frame:
+                raise Exception("No screenshot available")
+            
+            if (self.config.get_setting('skip_unchanged_frames', True)
+                    and frame["frame_id"] == self.last_sent_frame_id):
+                return [{
+                    "type": "text",
+                    "text": f"Screen unchanged since frame #{frame['frame_id']}; no new screenshot attached."
+                }]
+            
+            content = self._build_region_content(frame, self.last_sent_frame_id)
+            if content == []:
+                # Differs from the previous capture but not from what Claude saw
+                return [{
+                    "type": "text",
+                    "text": f"Screen unchanged since frame #{self.last_sent_frame_id}; no new screenshot attached."
+                }]
+            if content is None:
+                self._crops_since_keyframe = 0
+                content = [
+                    {
+                        "type": "text",
+                        "text": f"Screenshot frame #{frame['frame_id']} ({frame['resolution']}):"
+                    },
+                    self._image_block(
+                        frame["image_bytes"], frame["frame_id"], "full",
+                        self._last_image.size
+                    )
+                ]
+            else:
+                self._crops_since_keyframe += 1
+            
+            self.last_sent_frame_id = frame["frame_id"]
+            self._sent_pixels = self._last_pixels
+            return content
+
+    def reset_sent_state(self) -> None:
+        """Forget which frame was last sent, e.g. when a new conversation starts"""
+        self.last_sent_frame_id = 0
+        self._sent_pixels = None
+        self._crops_since_keyframe = 0
+        self.cancel_prefetch()
+        self.history.clear()
+
+
+def settle_thumbnail(capture: Image.Image, config) -> np.ndarray:
+    """Low-resolution grayscale copy of a capture, for cheap frame-to-frame comparisons"""
+    thumb_width = int(config.get_setting('settle_thumb_width', 320))
+    factor = max(1, capture.width // max(1, thumb_width))
+    if factor > 1:
+        capture = capture.reduce(factor)
+    return np.asarray(capture.convert('L'), dtype=np.int16)
+
+
+def encode_image_sources(messages: List[Dict[str, Any]],
+                         history: Optional[FrameHistory] = None) -> List[Dict[str, Any]]:
+    """Return a copy of messages with image payloads base64-encoded for the API.
+
+    Stored messages hold frame references (or raw bytes); only the request
+    payload built here holds the base64 text, and it is dropped after the call.
+    """
+    encoded = []
+    for message in messages:
+        content = message.get("content")
+        if not isinstance(content, list):
+            encoded.append(message)
+            continue
+        encoded.append(dict(message, content=_encode_blocks(content, history)))
+    return encoded
+
+
+def _encode_blocks(content: List[Any], history: Optional[FrameHistory]) -> List[Any]:
+    blocks = []
+    for block in content:
+        if (isinstance(block, dict) and block.get("type") == "tool_result"
+                and isinstance(block.get("content"), list)):
+            # Screenshots returned by computer tool calls sit inside the result
+            blocks.append(dict(block, content=_encode_blocks(block["content"], history)))
+            continue
+        source = block.get("source") if isinstance(block, dict) else None
+        if source and source.get("type") == "frame_ref":
+            if history is None:
+                raise Exception("Frame reference found but no frame history given")
+            data = history.get(source["ref"])
+        elif source and isinstance(source.get("data"), (bytes, bytearray, memoryview)):
+            data = source["data"]
+        else:
+            blocks.append(block)
+            continue
+        blocks.append(dict(block, source={
+            "type": "base64",
+            "media_type": source.get("media_type", "image/jpeg"),
+            "data": base64.b64encode(data).decode("ascii")
+        }))
+    return blocks
@@ -0,0 +1,190 @@
+# computeruse/core/text_entry.py
+import platform
+import time
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+import pyautogui
+from .screenshot_manager import settle_thumbnail
+
+try:
+    import pyperclip
+except ImportError:  # Installed with PyAutoGUI; without it long and non-ASCII text is typed
+    pyperclip = None
+
+STRATEGIES = ('paste', 'keys', 'per_char')
+# Rough cost of one key event sent without an interval, and of a clipboard paste
+KEY_EVENT_SECONDS = 0.005
+PASTE_SECONDS = 0.1
+
+
+def choose_strategy(text: str, config, clipboard: bool = True) -> str:
+    """Pick how to enter text: 'paste', 'keys' (zero-interval batch) or 'per_char'.
+
+    'auto' pastes non-ASCII text and anything of at least 'type_paste_min_chars'
+    characters, and sends short ASCII as key events. Without a clipboard,
+    non-ASCII text falls back to per-character typing with layout switching.
+    """
+    strategy = config.get_setting('type_strategy', 'auto')
+    if strategy == 'paste' and not clipboard:
+        strategy = 'auto'
+    if strategy in STRATEGIES:
+        return strategy
+    ascii_only = text.isascii()
+    if clipboard and (not ascii_only or len(text) >= int(config.get_setting('type_paste_min_chars', 32))):
+        return 'paste'
+    return 'keys' if ascii_only else 'per_char'
+
+
+def estimate_seconds(text: str, config) -> float:
+    """Expected time to enter text with the strategy auto would pick"""
+    strategy = choose_strategy(text, config, clipboard=pyperclip is not None)
+    if strategy == 'paste':
+        return PASTE_SECONDS
+    if strategy == 'keys':
+        return len(text) * KEY_EVENT_SECONDS
+    return len(text) * float(config.get_setting('type_char_interval', 0.1))
+
+
+class TextEntry:
+    """Enters text with the fastest strategy that fits the payload.
+
+    Clipboard paste for long or non-ASCII text, one zero-interval batch of key
+    events for short ASCII, and the old per-character typing (with keyboard
+    layout switching) only when the clipboard cannot be set. Pastes (or, with
+    'type_verify' True, every strategy) are checked by comparing frames taken
+    before and after around the focus point; the result is reported as
+    'verified'. Each check costs two or more full-screen captures and up to
+    'type_verify_timeout' of polling when nothing changes. Nothing is retyped
+    on a miss, since the text has usually landed somewhere the check did not
+    see (a slow redraw, or focus away from the last click).
+    """
+    def __init__(self, config, logger):
+        self.config = config
+        self.logger = logger
+        self.os_type = platform.system()
+        self._saved_clipboard: Optional[str] = None
+        self._pasted_at = 0.0
+
+    def enter(self, text: str, focus: Optional[Tuple[int, int]] = None,
+              switch_layout: Optional[Callable[[], None]] = None) -> Dict:
+        """Enter text at the focused control; focus is the native point to watch for changes"""
+        start = time.time()
+        strategy = choose_strategy(text, self.config, clipboard=self._clipboard_available())
+        before = self._snapshot(focus) if text and self._verify_enabled(strategy) else None
+
+        fallback_from = None
+        if strategy == 'paste' and not self._paste(text):
+            fallback_from = strategy
+        elif strategy == 'keys':
+            pyautogui.write(text, interval=0)
+        elif strategy == 'per_char':
+            self._type_per_character(text, switch_layout)
+
+        if fallback_from:
+            strategy = 'per_char'
+            self._type_per_character(text, switch_layout)
+        verified = self._changed(before, focus) if before is not None else None
+        self._restore_clipboard(pasted=verified is True)
+
+        elapsed = time.time() - start
+        self.logger.add_entry("Debug",
+            f"Text entry: {len(text)} chars via {strategy} in {elapsed:.2f}s"
+            + ("" if verified is None else f" ({'verified' if verified else 'no visible change'})")
+        )
+        result = {"strategy": strategy, "verified": verified, "elapsed": round(elapsed, 3)}
+        if fallback_from:
+            result["fallback_from"] = fallback_from
+        return result
+
+    # Strategies
+
+    def _paste(self, text: str) -> bool:
+        """Put text on the clipboard and paste it; trailing newlines are pressed as Enter"""
+        body = text.rstrip('\n')
+        self._saved_clipboard = None
+        try:
+            if self.config.get_setting('type_restore_clipboard', True):
+                self._saved_clipboard = pyperclip.paste()
+            if body:
+                pyperclip.copy(body)
+        except Exception as e:
+            self.logger.add_entry("Debug", f"Clipboard unavailable, typing instead: {str(e)}")
+            return False
+        if body:
+            pyautogui.hotkey('command' if self.os_type == 'Darwin' else 'ctrl', 'v')
+            self._pasted_at = time.time()
+        for _ in range(len(text) - len(body)):
+            pyautogui.press('enter')
+        return True
+
+    def _restore_clipboard(self, pasted: bool) -> None:
+        """Put the previous clipboard back once the target app has read the pasted text.
+
+        Apps handle Ctrl+V asynchronously, so unless the paste was seen on
+        screen, 'type_clipboard_restore_delay' is allowed to pass first.
+        """
+        if self._saved_clipboard is None:
+            return
+        if not pasted:
+            delay = float(self.config.get_setting('type_clipboard_restore_delay', 0.3))
+            time.sleep(max(0.0, self._pasted_at + delay - time.time()))
+        try:
+            pyperclip.copy(self._saved_clipboard)
+        except Exception as e:
+            self.logger.add_entry("Debug", f"Could not restore clipboard: {str(e)}")
+        self._saved_clipboard = None
+
+    def _type_per_character(self, text: str, switch_layout: Optional[Callable[[], None]]) -> None:
+        if switch_layout is not None:
+            switch_layout()
+        pyautogui.write(text, interval=float(self.config.get_setting('type_char_interval', 0.1)))
+
+    def _clipboard_available(self) -> bool:
+        return pyperclip is not None
+
+    # Verification
+
+    def _verify_enabled(self, strategy: str) -> bool:
+        """'paste' (default) checks only pastes: key events cannot silently no-op like a failed paste"""
+        verify = self.config.get_setting('type_verify', 'paste')
+        return strategy == 'paste' if verify == 'paste' else bool(verify)
+
+    def _snapshot(self, focus: Optional[Tuple[int, int]]) -> Optional[Tuple[Optional[np.ndarray], np.ndarray]]:
+        """Full-resolution crop around the focus point plus a low-resolution full frame"""
+        try:
+            capture = pyautogui.screenshot()
+        except Exception as e:
+            self.logger.add_entry("Debug", f"Text entry verification skipped: {str(e)}")
+            return None
+        region = None
+        if focus is not None:
+            width, height = self.config.get_setting('type_verify_region', (600, 160))
+            left = max(0, int(focus[0] - width / 2))
+            top = max(0, int(focus[1] - height / 2))
+            box = (left, top, min(capture.width, left + int(width)), min(capture.height, top + int(height)))
+            if box[2] > box[0] and box[3] > box[1]:
+                region = np.asarray(capture.crop(box).convert('L'), dtype=np.int16)
+        return region, settle_thumbnail(capture, self.config)
+
+    def _changed(self, before: Tuple[Optional[np.ndarray], np.ndarray],
+                 focus: Optional[Tuple[int, int]]) -> Optional[bool]:
+        """Poll until the focus region (or, failing that, the whole frame) differs from before.
+
+        None if frames could not be captured.
+        """
+        tolerance = int(self.config.get_setting('change_pixel_tolerance', 16))
+        min_pixels = int(self.config.get_setting('type_verify_min_pixels', 24))
+        timeout = float(self.config.get_setting('type_verify_timeout', 0.5))
+        interval = float(self.config.get_setting('settle_interval', 0.1)) / 2
+        deadline = time.time() + timeout
+        while True:
+            after = self._snapshot(focus)
+            if after is None:
+                return None
+            for old, new in zip(before, after):
+                if old is not None and new is not None and old.shape == new.shape:
+                    if np.count_nonzero(np.abs(new - old) > tolerance) >= min_pixels:
+                        return True
+            if time.time() + interval > deadline:
+                return False
+            time.sleep(interval)
@@ -0,0 +1,168 @@
+# computeruse/core/tool_use.py
+import json
+from typing import Any, Dict, List, Optional
+from .action_parser import (
+    Action, CursorPosition, DoubleClick, KeyPress, LeftClick, LeftClickDrag, MiddleClick,
+    MouseMove, RightClick, Screenshot, TypeText, Wait
+)
+
+COMPUTER_TOOL_NAME = 'computer'
+# xdotool key names used by the computer tool -> pyautogui key names
+KEY_NAMES = {
+    'return': 'enter',
+    'kp_enter': 'enter',
+    'escape': 'esc',
+    'control': 'ctrl',
+    'control_l': 'ctrl',
+    'control_r': 'ctrlright',
+    'alt_l': 'alt',
+    'alt_r': 'altright',
+    'shift_l': 'shift',
+    'shift_r': 'shiftright',
+    'super': 'win',
+    'super_l': 'win',
+    'super_r': 'winright',
+    'meta': 'win',
+    'cmd': 'command',
+    'page_up': 'pageup',
+    'prior': 'pageup',
+    'page_down': 'pagedown',
+    'next': 'pagedown',
+    'caps_lock': 'capslock',
+    'num_lock': 'numlock',
+    'scroll_lock': 'scrolllock',
+    'print': 'printscreen',
+    'menu': 'apps',
+    'minus': '-',
+    'plus': '+',
+    'equal': '=',
+    'period': '.',
+    'comma': ',',
+    'slash': '/',
+    'space': 'space'
+}
+CLICKS = {
+    'left_click': LeftClick,
+    'right_click': RightClick,
+    'double_click': DoubleClick,
+    'middle_click': MiddleClick
+}
+
+
+def translate_key(key: str) -> str:
+    """Map an xdotool key or chord ("ctrl+Return") to pyautogui names joined by '+'"""
+    parts = [part.strip() for part in key.split('+')] if len(key) > 1 else [key]
+    if not all(parts):
+        raise ValueError(f"invalid key '{key}'")
+    # A single character keeps its case, like in the text action format
+    return '+'.join(part if len(part) == 1 else KEY_NAMES.get(part.lower(), part.lower()) for part in parts)
+
+
+def _coordinate(tool_input: Dict[str, Any]) -> List[float]:
+    coordinate = tool_input.get('coordinate')
+    if not isinstance(coordinate, (list, tuple)) or len(coordinate) != 2:
+        raise ValueError(f"expected coordinate [x, y], got {coordinate!r}")
+    return [float(coordinate[0]), float(coordinate[1])]
+
+
+def actions_for_tool_input(tool_input: Dict[str, Any]) -> List[Action]:
+    """Map one computer tool input to the actions ActionHandler runs for it"""
+    action = tool_input.get('action')
+    if action in CLICKS:
+        clicks: List[Action] = []
+        if tool_input.get('coordinate') is not None:
+            clicks.append(MouseMove(*_coordinate(tool_input)))
+        return clicks + [CLICKS[action]()]
+    if action == 'mouse_move':
+        return [MouseMove(*_coordinate(tool_input))]
+    if action == 'left_click_drag':
+        return [LeftClickDrag(*_coordinate(tool_input))]
+    if action == 'type':
+        text = tool_input.get('text')
+        if not isinstance(text, str):
+            raise ValueError("type requires 'text'")
+        return [TypeText(text)]
+    if action == 'key':
+        key = tool_input.get('text')
+        if not isinstance(key, str) or not key:
+            raise ValueError("key requires 'text'")
+        return [KeyPress(translate_key(key))]
+    if action == 'screenshot':
+        return [Screenshot()]
+    if action == 'cursor_position':
+        return [CursorPosition()]
+    if action == 'wait':
+        return [Wait(float(tool_input.get('duration', 1.0)))]
+    raise ValueError(f"unsupported computer action '{action}'")
+
+
+class ToolCall:
+    """One tool_use block, the actions it maps to and their results"""
+    __slots__ = ('id', 'name', 'input', 'actions', 'error', 'results')
+
+    def __init__(self, id: str, name: str, input: Dict[str, Any]):
+        self.id = id
+        self.name = name
+        self.input = input
+        self.actions: List[Action] = []
+        self.error: Optional[str] = None
+        self.results: Optional[List[Dict[str, Any]]] = None
+        if name != COMPUTER_TOOL_NAME:
+            self.error = f"unknown tool '{name}'"
+            return
+        try:
+            self.actions = actions_for_tool_input(input if isinstance(input, dict) else {})
+        except (TypeError, ValueError) as e:
+            self.error = str(e)
+
+    @classmethod
+    def from_block(cls, block: Any) -> "ToolCall":
+        return cls(block.id, block.name, getattr(block, 'input', None) or {})
+
+    def failed(self) -> bool:
+        return bool(self.error) or any(result.get("type") == "error" for result in self.results or [])
+
+    def result_block(self, extra_content: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Build the tool_result block answering this call"""
+        if self.error:
+            text = f"Invalid tool call: {self.error}"
+        elif self.results is None:
+            text = "Not executed: the task was stopped"
+        else:
+            text = json.dumps(self.results[0] if len(self.results) == 1 else self.results)
+        block = {
+            "type": "tool_result",
+            "tool_use_id": self.id,
+            "content": [{"type": "text", "text": text}] + list(extra_content or [])
+        }
+        if self.failed() or self.results is None:
+            block["is_error"] = True
+        return block
+
+    def __repr__(self) -> str:
+        return f"ToolCall({self.id!r}, {self.input!r})"
+
+
+def parse_tool_calls(content: List[Any]) -> List[ToolCall]:
+    """Collect the tool_use blocks of a response in order"""
+    return [ToolCall.from_block(block) for block in content if getattr(block, 'type', None) == 'tool_use']
+
+
+def assistant_content(content: List[Any]) -> List[Dict[str, Any]]:
+    """Convert response content blocks to the dicts stored in the conversation history"""
+    blocks = []
+    for block in content:
+        block_type = getattr(block, 'type', None)
+        if block_type == 'text' and block.text:
+            blocks.append({"type": "text", "text": block.text})
+        elif block_type == 'tool_use':
+            blocks.append({"type": "tool_use", "id": block.id, "name": block.name, "input": block.input})
+    return blocks
+
+
+def tool_result_content(calls: List[ToolCall], image_content: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Answer every call of a turn; the latest screen goes with the last result"""
+    return [
+        call.result_block(image_content if i == len(calls) - 1 else None)
+        for i, call in enumerate(calls)
+    ]
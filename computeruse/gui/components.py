@@ -3,7 +3,6 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext
 from typing import Any, Optional, Tuple
 from PIL import Image, ImageTk
-import base64
 from io import BytesIO
 
 
@@ -102,6 +101,19 @@ class OptionsFrame(ttk.LabelFrame):
         self.downscale_label = ttk.Label(scale_frame, text="0.5")
         self.downscale_label.pack(side=tk.LEFT, padx=5)
         
+        # Auto-tune the scale from the image token budget
+        self.auto_downscale_var = tk.BooleanVar(
+            value=self.controller.config.get_setting('auto_downscale', False)
+        )
+        ttk.Checkbutton(
+            resolution_frame,
+            text="Auto (token budget)",
+            variable=self.auto_downscale_var,
+            command=lambda: self.controller.config.update_setting(
+                'auto_downscale', self.auto_downscale_var.get()
+            )
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Native resolution display
         native_res = f"{self.controller.interface.native_width}x{self.controller.interface.native_height}"
         ttk.Label(resolution_frame, text=f"Native: {native_res}").pack(side=tk.LEFT, padx=10)
@@ -254,9 +266,9 @@ class PreviewFrame(ttk.LabelFrame):
         # Coordinate markers
         self.markers = []
     
-    def update_preview(self, screenshot_data: str) -> None:
+    def update_preview(self, screenshot_data: bytes) -> None:
         try:
-            screenshot = Image.open(BytesIO(base64.b64decode(screenshot_data)))
+            screenshot = Image.open(BytesIO(screenshot_data))
             
             # Get widget dimensions
             width = self.winfo_width()
@@ -4,8 +4,7 @@ import pyautogui
 from tkinter import ttk, messagebox
 from typing import Optional
 import threading
-import json
-import time
+import asyncio
 from PIL import Image, ImageTk
 import base64
 from io import BytesIO
@@ -15,7 +14,7 @@ from .components import (
     CoordinateDebugFrame
 )
 from .styles import create_style
-from ..core.interface import Interface
+from ..core.async_interface import AsyncInterface
 from ..utils.config import Config
 from ..utils.logger import Logger
 
@@ -27,7 +26,7 @@ class ComputerInterface:
         # Initialize core components
         self.config = Config()
         self.logger = Logger()
-        self.interface = Interface(self.config, self.logger)
+        self.interface = AsyncInterface(self.config, self.logger)
         
 
         # Check for API key using the Config class
@@ -42,6 +41,11 @@ class ComputerInterface:
         # Create GUI
         self.create_gui()
         
+        # Refresh the preview whenever the frame store receives a new frame
+        self.interface.screenshot_manager.add_listener(
+            lambda frame: self.root.after(0, self.update_screenshot_preview)
+        )
+        
     def setup_window(self) -> None:
         self.root.title("Claude Computer Use Interface")
         
@@ -185,18 +189,26 @@ class ComputerInterface:
             # Update UI state
             self.status_bar.progress_var.set(0)
             
-            # Update interface resolution
-            self.interface.update_target_resolution(
-                self.options_frame.downscale_var.get()
-            )
+            # Update interface resolution, from the token budget when auto-tuning
+            auto_factor = self.interface.auto_tune_resolution()
+            if auto_factor is not None:
+                self.root.after(0, lambda: self.options_frame.downscale_var.set(auto_factor))
+                self.root.after(0, lambda: self.options_frame.update_all_scale_display(auto_factor))
+            else:
+                self.interface.update_target_resolution(
+                    self.options_frame.downscale_var.get()
+                )
             
             self.logger.add_entry("User", prompt)
             self.input_frame.clear_input()
             
+            initial_text = f"Task to complete: {prompt}\nYou are now given the latest screenshot for the current state."
+            if self.config.get_setting('async_runtime', False):
+                asyncio.run(self.interface.run_task(initial_text))
+                return
+            
             # Create and send initial message
-            initial_message = self.interface.create_message_with_screenshot(
-                f"Task to complete: {prompt}\nYou are now given the latest screenshot for the current state." + self.interface.create_system_prompt()
-            )
+            initial_message = self.interface.create_message_with_screenshot(initial_text)
             
             self.interface.conversation_history.append(initial_message)
             response = self.interface.send_message([initial_message])
@@ -209,161 +221,6 @@ class ComputerInterface:
             self.interface.is_processing = False
             self.root.after(0, self.reset_submit_button)
             
-    def process_response(self, response) -> None:
-        try:
-            if self.should_stop:
-                self.logger.add_entry("System", "Task stopped by user")
-                return
-                
-            if self.current_iteration >= self.config.get_setting('max_iterations'):
-                self.logger.add_entry("System", 
-                    f"Maximum iterations ({self.config.get_setting('max_iterations')}) reached.")
-                self.task_complete = True
-                return
-
-            self.current_iteration += 1
-            
-            # Track goal indicators
-            goal_indicators = [
-                "completed", "finished", "done", "accomplished",
-                "success", "achieved", "ready", "set up"
-            ]
-            
-            task_progress = []
-            
-            for content in response.content:
-                if self.should_stop:
-                    self.logger.add_entry("System", "Task stopped by user")
-                    return
-                    
-                if hasattr(content, 'text'):
-                    text = content.text.lower()
-                    if any(indicator in text for indicator in goal_indicators):
-                        task_progress.append({
-                            'timestamp': time.time(),
-                            'indicators': [i for i in goal_indicators if i in text],
-                            'text': text
-                        })
-                    
-                    self.conversation_history.append({
-                        "role": "assistant",
-                        "content": [{
-                            "type": "text",
-                            "text": content.text
-                        }]
-                    })
-                    self.logger.add_entry("Claude", content.text)
-                    
-                elif hasattr(content, 'type') and content.type == 'tool_use':
-                    try:
-                        # Extract action information
-                        tool_input = content.input if hasattr(content, 'input') else {}
-                        
-                        if not isinstance(tool_input, dict):
-                            tool_input = {}
-                        
-                        action = tool_input.get('action', '')
-                        
-                        if not action:
-                            self.logger.add_entry("Error", "No action specified in tool use request")
-                            continue
-                        
-                        self.logger.add_entry("Tool", f"Executing: {action}")
-                        
-                        # Execute the action
-                        result = self.action_handler.execute_action(action, tool_input)
-                        
-                        wait_time = self.config.get_setting('wait_time')
-                        time.sleep(wait_time)
-                        
-                        if result:
-                            if result.get("type") == "error":
-                                self.logger.add_entry("Error", f"Action failed: {result.get('error', 'Unknown error')}")
-                            else:
-                                # Create next message with current state
-                                next_message = self.create_message_with_screenshot(
-                                    f"Your current task is: {self.current_task}\n"
-                                    f"Action completed: {action} with result: {json.dumps(result)}. "
-                                    f"Please verify if the task is completed. If not, continue with the necessary actions."
-                                )
-                                
-                                self.conversation_history.append(next_message)
-                                
-                                # Send next message if not stopped
-                                if not self.should_stop:
-                                    new_response = self.send_message(
-                                        self.conversation_history
-                                    )
-                                    self.process_response(new_response)
-                        
-                    except Exception as action_error:
-                        self.logger.add_entry("Error", f"Action execution failed: {str(action_error)}")
-                        return
-
-            # Check for task completion
-            if len(task_progress) >= 2:
-                time_diff = task_progress[-1]['timestamp'] - task_progress[0]['timestamp']
-                if time_diff > 5.0:
-                    common_indicators = set.intersection(
-                        *[set(p['indicators']) for p in task_progress]
-                    )
-                    if common_indicators:
-                        self.task_complete = True
-                        self.logger.add_entry("System", 
-                            f"Task completion detected with indicators: {', '.join(common_indicators)}")
-                        return
-
-        except Exception as e:
-            self.logger.add_entry("Error", f"Error processing response: {str(e)}")
-            self.task_complete = True
-    
-    def process_action_result(self, result: dict) -> None:
-        """Process the result of an action"""
-        try:
-            if result.get("type") == "screenshot_taken":
-                screenshot_data = self.interface.screenshot_manager.get_current_screenshot()
-                if screenshot_data and self.options_frame.show_screenshots_var.get():
-                    self.root.after(0, lambda: self.preview_frame.update_preview(
-                        screenshot_data["image_data"]
-                    ))
-            
-            # Create next message with current state
-            next_message = self.interface.create_message_with_screenshot(
-                f"Your current task is: {self.interface.current_task}\n"
-                f"Action completed: {json.dumps(result)}. "
-                f"Please verify if the task is completed. If not, continue with the necessary actions."
-            )
-            
-            self.interface.conversation_history.append(next_message)
-            
-            # Send next message if not stopped
-            if not self.interface.should_stop:
-                new_response = self.interface.send_message(
-                    self.interface.conversation_history
-                )
-                self.process_response(new_response)
-                
-        except Exception as api_error:
-            if "safety reasons" in str(api_error):
-                if not self.interface.should_stop:
-                    self.logger.add_entry("System", "Retrying without screenshot...")
-                    # Remove screenshot content from messages
-                    filtered_messages = [
-                        {
-                            "role": msg["role"],
-                            "content": [
-                                content for content in msg["content"]
-                                if content["type"] == "text"
-                            ]
-                        }
-                        for msg in self.interface.conversation_history
-                    ]
-                    retry_response = self.interface.send_message(filtered_messages)
-                    self.process_response(retry_response)
-            else:
-                raise api_error
-    
-
     def stop_processing(self) -> None:
         """Stop current task processing"""
         if self.interface.is_processing:
@@ -379,14 +236,11 @@ class ComputerInterface:
         self.options_frame.snap_to_nearest_tenth(None)
         self.config.update_setting('downscale_factor', self.options_frame.downscale_var.get())
         
-        if self.interface.screenshot_manager.current_screenshot:
-            self.preview_frame.update_preview(
-                self.interface.screenshot_manager.current_screenshot["image_data"]
-            )
+        current_screenshot = self.interface.screenshot_manager.get_current_screenshot()
+        if current_screenshot:
+            self.preview_frame.update_preview(current_screenshot["image_bytes"])
     
     def update_screenshot_preview(self) -> None:
-        if (self.interface.screenshot_manager.current_screenshot and 
-                self.options_frame.show_screenshots_var.get()):
-            self.preview_frame.update_preview(
-                self.interface.screenshot_manager.current_screenshot["image_data"]
-            )
\ No newline at end of file
+        current_screenshot = self.interface.screenshot_manager.get_current_screenshot()
+        if current_screenshot and self.options_frame.show_screenshots_var.get():
+            self.preview_frame.update_preview(current_screenshot["image_bytes"])
@@ -6,7 +6,7 @@ from typing import Dict, Any
 @dataclass
 class ConfigDefaults:
     DOWNSCALE_FACTOR: float = 0.5
-    MIN_ACTION_DELAY: float = 0.5
+    MIN_ACTION_DELAY: float = 0.0
     MAX_ITERATIONS: int = 20
     DEFAULT_WAIT_TIME: float = 3.0
     SCREENSHOT_QUALITY: int = 60
@@ -17,12 +17,111 @@ class Config:
         # Initialize with 0.5 scale by default
         self.settings = {
             'downscale_factor': 0.5,  # Start with 0.5 scale
-            'min_action_delay': 0.5,
+            # Pick downscale_factor from a per-frame image token budget instead
+            'auto_downscale': False,
+            'image_token_budget': 1600,
+            # Inter-action delays and move speeds: 'careful', 'normal' or 'turbo' (VMs where the UI keeps up)
+            'timing_profile': 'normal',
+            # Per action kind delay overrides in seconds, e.g. {'left_click': 0.4}
+            'action_delays': {},
+            # Floor for every inter-action delay on top of the profile (0 = profile only)
+            'min_action_delay': 0.0,
+            # Fuse move+click, drop no-op moves, merge waits and type runs before a plan runs
+            'optimize_actions': True,
             'max_iterations': 20,
             'wait_time': 3.0,
             'screenshot_quality': 60,
+            # Downscale filter: 'auto' picks Image.reduce for 1/n factors, box otherwise
+            'resize_mode': 'auto',
+            # Adaptive JPEG: a byte budget > 0 searches for the best quality that fits
+            'jpeg_byte_budget': 0,
+            'jpeg_min_quality': 30,
+            'jpeg_max_quality': 90,
+            'jpeg_max_attempts': 5,
+            'jpeg_optimize': False,
+            # Settle detection: waits return once low-res frames stop changing
+            'settle_detection': True,
+            'settle_interval': 0.1,
+            'settle_frames': 3,
+            'settle_thumb_width': 320,
+            # Share of an explicit [wait] kept if the screen shows no change at all
+            'settle_unchanged_fraction': 0.5,
+            # Encode the post-action frame in the background while the screen settles
+            'pipelined_capture': True,
             'teleport_mouse': False,
-            'show_screenshots': False
+            # Text entry: 'auto' pastes long or non-ASCII text and sends short ASCII as one
+            # batch of key events; 'paste', 'keys' or 'per_char' force a strategy
+            'type_strategy': 'auto',
+            'type_paste_min_chars': 32,
+            'type_char_interval': 0.1,
+            'type_restore_clipboard': True,
+            # Seconds a paste gets to be read before the clipboard is restored (unless seen on screen)
+            'type_clipboard_restore_delay': 0.3,
+            # Compare frames around the focus point after typing and report it as 'verified':
+            # 'paste' checks pastes only, True every strategy (two or more full-screen captures
+            # and up to type_verify_timeout per [type]), False none
+            'type_verify': 'paste',
+            'type_verify_timeout': 0.5,
+            'type_verify_region': (600, 160),
+            'type_verify_min_pixels': 24,
+            'show_screenshots': False,
+            # Change detection: identical frames are not re-encoded or re-sent
+            'skip_unchanged_frames': True,
+            'change_hash_size': 16,
+            'change_pixel_tolerance': 16,
+            'change_max_pixels': 0,
+            # Screenshot history: recent payloads in memory, older ones spilled to disk
+            'history_frames_in_memory': 8,
+            'history_spill_dir': None,
+            # 'tool_use' runs computer tool calls; 'text' parses the numbered [action] reply format
+            'action_format': 'tool_use',
+            # Stream responses and run each action as soon as its line (or tool call) is complete
+            'streaming': False,
+            # API retries: jittered exponential backoff; optional shared tokens-per-minute ceiling (0 = off)
+            'api_max_retries': 5,
+            'api_backoff_base': 1.0,
+            'api_backoff_max': 60.0,
+            'api_tokens_per_minute': 0,
+            # API endpoint override (e.g. benchmarks/mock_server.py); None uses the default
+            'api_base_url': None,
+            # Client setup: format-only key check with lazy validation, shared keep-alive pool
+            'validate_key_on_init': False,
+            'prewarm_connection': True,
+            'http_connect_timeout': 5.0,
+            'http_read_timeout': 120.0,
+            'http_write_timeout': 30.0,
+            'http_pool_timeout': 10.0,
+            'http_max_connections': 10,
+            'http_keepalive_connections': 5,
+            'http_keepalive_expiry': 60.0,
+            # Opt-in on-disk response cache keyed on the request with perceptual image hashes
+            'response_cache': False,
+            'response_cache_dir': None,
+            'response_cache_ttl': 86400,
+            'response_cache_max_entries': 500,
+            # Capture and pre-encode a candidate frame while a request is in flight;
+            # the first request waits prefetch_delay, later ones a fraction of the observed latency
+            'speculative_prefetch': True,
+            'prefetch_delay': 1.0,
+            'prefetch_fraction': 0.7,
+            # Run the agent loop on asyncio with AsyncAnthropic instead of blocking calls
+            'async_runtime': False,
+            # Send the system prompt as a cached 'system' block and cache the stable prefix
+            'prompt_caching': True,
+            # Request history: keep the last K images in full, fit text to a token budget
+            'history_keep_images': 3,
+            # Older images are dropped this many at a time so the cached prefix survives between drops
+            'history_image_step': 3,
+            'history_max_input_tokens': 60000,
+            'history_keep_recent_messages': 4,
+            'history_compact_text_chars': 600,
+            # Dirty regions: send crops of changed areas instead of full frames
+            'dirty_regions': True,
+            'dirty_tile_size': 32,
+            'dirty_tile_margin': 1,
+            'dirty_max_regions': 4,
+            'dirty_max_area_ratio': 0.4,
+            'dirty_keyframe_interval': 3
         }
     
     def get_setting(self, key: str, default: Any = None) -> Any:
@@ -40,7 +139,7 @@ class Config:
                 value = 1.0
             elif value < 0.1:
                 value = 0.1
-            self.settings[key] = value
+        self.settings[key] = value
     
     def get_api_key(self) -> str:
         """Get the API key from environment"""
@@ -30,7 +30,9 @@ def check_requirements() -> bool:
     package_map = {
         'anthropic': 'anthropic',
         'Pillow': 'PIL',  # Pillow imports as PIL
-        'PyAutoGUI': 'pyautogui'
+        'PyAutoGUI': 'pyautogui',
+        'numpy': 'numpy',
+        'pyperclip': 'pyperclip'
     }
     
     missing_packages = []